@@ -1,19 +1,73 @@
-from flask import Flask
+from flask import Config, Flask
 from flask_marshmallow import Marshmallow
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+import os
+from typing import Any
 
 
 app = Flask(__name__)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-ma = Marshmallow(app)
+db = SQLAlchemy()
+ma = Marshmallow()
 
 
-if app.debug:
-    from flask_debugtoolbar import DebugToolbarExtension
-    toolbar = DebugToolbarExtension(app)
-    toolbar.init_app(app)
-    app.TEMPLATES_AUTO_RELOAD = True
+def create_app(config: Any = "config", **overrides: Any) -> Flask:
+    """
+    Configures the application and registers its models, routes and CLI commands. The app, db and ma objects are
+    process wide singletons that the other modules import, so only the first call configures them; later calls return
+    the same app if they ask for the same configuration.
 
+    Args:
+        config: config object or import path, defaults to the "config" module
+        overrides: config keys set after loading config, e.g. DEBUG=False
 
-from app import models, controllers
\ No newline at end of file
+    Returns:
+        Flask: the application
+
+    Raises:
+        RuntimeError: if the app was already created with different values for any of the requested keys
+
+    """
+    requested = Config(app.root_path)
+    requested.from_object(config)
+    requested.update(overrides)
+    if "sqlalchemy" in app.extensions:
+        changed = sorted(key for key, value in requested.items() if app.config.get(key) != value)
+        if changed:
+            raise RuntimeError("The app was already created with different values for {}; it can only be configured "
+                               "once per process".format(", ".join(changed)))
+        return app
+
+    app.config.update(requested)
+    db.app = app
+    db.init_app(app)
+    ma.init_app(app)
+
+    if app.debug:
+        from flask_debugtoolbar import DebugToolbarExtension
+        DebugToolbarExtension(app)
+        app.TEMPLATES_AUTO_RELOAD = True
+
+    from app import models, controllers, rollup, seed, poolstats
+    with app.app_context():
+        poolstats.instrument(db.engine)
+    return app
+
+
+@event.listens_for(Pool, "connect")
+def _remember_pid(dbapi_connection: Any, connection_record: Any) -> None:
+    connection_record.info["pid"] = os.getpid()
+
+
+@event.listens_for(Pool, "checkout")
+def _check_pid(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+    """
+    Fork safety for pre-forked workers: a connection opened by another process (e.g. the gunicorn master) is detached
+    without being closed, since that process still owns the socket, and the pool replaces it with a new one
+    """
+    pid = os.getpid()
+    if connection_record.info["pid"] != pid:
+        connection_record.connection = connection_proxy.connection = None
+        raise exc.DisconnectionError("Connection record belongs to pid {}, attempting to check out in pid {}"
+                                     .format(connection_record.info["pid"], pid))
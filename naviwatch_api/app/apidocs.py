@@ -0,0 +1,79 @@
+from app import app, documentation
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable
+
+
+"""
+Lazily loaded Swagger UI and spec. Importing flasgger (and jsonschema with it) is a large share of worker start up, and
+the docs are rarely requested, so outside debug mode flasgger is only imported and registered when the first request
+for the docs arrives. The generated spec is cached for the life of the process since the routes cannot change once the
+app is serving.
+
+Flasgger is registered from a WSGI wrapper before Flask matches the request, so that first request is routed to it.
+"""
+
+""" url prefixes served by flasgger """
+PREFIXES = ("/apidocs", "/apispec", "/flasgger_static")
+
+
+def _swagger() -> Any:
+    """
+    Returns:
+        Swagger: flasgger extension registered on app, with the spec cached per endpoint
+
+    """
+    from flasgger import Swagger
+
+    class CachedSwagger(Swagger):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            self._specs: Dict[str, Dict] = dict()
+            super().__init__(*args, **kwargs)
+
+        def get_apispecs(self, endpoint: str = "apispec_1") -> Dict:
+            if endpoint not in self._specs:
+                self._specs[endpoint] = super().get_apispecs(endpoint)
+            return self._specs[endpoint]
+
+    return CachedSwagger(app, template=documentation.swagger_template)
+
+
+class LazyDocs(object):
+    """
+    WSGI wrapper around app.wsgi_app that registers flasgger on the first request under PREFIXES
+
+    Args:
+        wsgi_app: the wrapped WSGI callable
+
+    """
+
+    def __init__(self, wsgi_app: Callable) -> None:
+        self.wsgi_app = wsgi_app
+        self.swagger = None
+        self._lock = Lock()
+
+    def load(self) -> Any:
+        with self._lock:
+            if self.swagger is None:
+                self.swagger = _swagger()
+        return self.swagger
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if self.swagger is None and environ.get("PATH_INFO", "").startswith(PREFIXES):
+            self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def init_docs() -> None:
+    """
+    Sets up the docs: immediately in debug mode (Flask refuses new routes after the first request there), otherwise on
+    first use
+
+    Returns:
+        None
+
+    """
+    app.config["SWAGGER"] = {"uiversion": 3}
+    docs = LazyDocs(app.wsgi_app)
+    app.wsgi_app = docs
+    if app.debug:
+        docs.load()
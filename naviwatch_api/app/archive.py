@@ -0,0 +1,172 @@
+from app import app, db, models, cache
+from sqlalchemy import Column, Index, PrimaryKeyConstraint, Table, func, text
+import click
+import datetime
+import re
+import time
+from typing import Dict, Optional, Type
+
+
+"""
+Retention for the event tables. "flask archive --older-than 180d" moves Food, Watercheck, Activities and Toilet rows
+created before the cutoff into matching <Model>Archive tables, which have the same columns but no foreign keys. Rows
+are moved in batches of ARCHIVE_BATCH_SIZE, each copied and deleted in its own short transaction, walking the primary
+key so no batch rescans rows already looked at; concurrent writes only ever wait for one batch.
+
+On MySQL the archive tables use compressed InnoDB pages and are range partitioned by year of date_created; a partition
+is split off the catch-all "pmax" partition before the first rows of a year are archived. On other databases they are
+plain tables.
+
+Archived rows keep their xid and still count in DailyPetStats. The newest row of each table is never archived: MySQL
+before 8.0 resets AUTO_INCREMENT to the largest remaining xid + 1 on restart, and SQLite tables created without
+AUTOINCREMENT do so on every insert, so emptying a table would hand out archived xids again. Collection and xid GETs
+on the event resources (and the pet summary) read them too when passed "include_archive=true".
+"""
+
+ARCHIVE_SUFFIX = "Archive"
+
+""" MySQL table options: compressed pages, one partition per year plus a catch-all that new years are split from """
+MYSQL_OPTIONS = {"mysql_row_format": "COMPRESSED",
+                 "mysql_partition_by": "RANGE (YEAR(date_created)) (PARTITION pmax VALUES LESS THAN MAXVALUE)"}
+
+
+def _archive_model(model: Type[models.Base]) -> Type[db.Model]:
+    """
+    Declares <Model>Archive: the columns of model without foreign keys, keyed on (xid, date_created) since MySQL
+    partitioning needs the partition column in the primary key
+    """
+    name = model.__tablename__ + ARCHIVE_SUFFIX
+    columns = [Column(column.name, column.type, key=column.key, autoincrement=False,
+                      nullable=column.key not in ("xid", "date_created") and column.nullable)
+               for column in model.__table__.columns]
+    table = Table(name, db.metadata, *columns,
+                  PrimaryKeyConstraint("xid", "date_created", name="pk_{}".format(name)),
+                  Index("ix_{}_pet_xid_date_created".format(name), "pet_xid", "date_created"),
+                  **MYSQL_OPTIONS)
+    return type(name, (db.Model,), {"__table__": table})
+
+
+""" event model -> archive model """
+ARCHIVES: Dict[Type[models.Base], Type[db.Model]] = {
+    model: _archive_model(model) for model in (models.Food, models.Watercheck, models.Activities, models.Toilet)}
+
+
+def parse_age(value: str) -> datetime.timedelta:
+    """
+    Args:
+        value: an age like "180d", "26w" or "36h"; a bare number is days
+
+    Returns:
+        timedelta: the age
+
+    Raises:
+        ValueError: if value is not an age
+
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([hdw]?)\s*", value.lower())
+    if not match:
+        raise ValueError("invalid age: '{}'".format(value))
+    number, unit = int(match.group(1)), match.group(2) or "d"
+    return datetime.timedelta(**{{"h": "hours", "d": "days", "w": "weeks"}[unit]: number})
+
+
+def _ensure_partition(archive: Table, year: int) -> None:
+    """ Splits a partition for rows of year off pmax unless a partition already holds that year (MySQL only) """
+    bounds = db.session.execute(text(
+        "SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME != 'pmax'"),
+        {"table": archive.name}).fetchall()
+    if any(int(bound) > year for bound, in bounds):
+        return
+    db.session.execute(text(
+        "ALTER TABLE `{table}` REORGANIZE PARTITION pmax INTO "
+        "(PARTITION p{year} VALUES LESS THAN ({next}), PARTITION pmax VALUES LESS THAN MAXVALUE)".format(
+            table=archive.name, year=year, next=year + 1)))
+
+
+def archive_model(model: Type[models.Base], cutoff: datetime.datetime, batch_size: Optional[int] = None,
+                  pause: float = 0.0) -> int:
+    """
+    Moves the rows of model created before cutoff, except the row with the largest xid, into its archive table in
+    batches
+
+    Args:
+        model: event model, one of ARCHIVES
+        cutoff: rows with an earlier date_created are archived
+        batch_size: rows per transaction, defaults to ARCHIVE_BATCH_SIZE
+        pause: seconds to sleep between batches
+
+    Returns:
+        int: number of rows archived
+
+    """
+    batch_size = batch_size or app.config.get("ARCHIVE_BATCH_SIZE", 1000)
+    hot = model.__table__
+    archive = ARCHIVES[model].__table__
+    mysql = db.engine.dialect.name == "mysql"
+    newest = db.session.query(func.max(hot.c.xid)).scalar()
+    years = set()
+    moved = 0
+    last = 0
+    while newest is not None:
+        rows = db.session.execute(hot.select()
+                                  .where(hot.c.xid > last)
+                                  .where(hot.c.xid < newest)
+                                  .where(hot.c.date_created < cutoff)
+                                  .order_by(hot.c.xid)
+                                  .limit(batch_size)).fetchall()
+        if not rows:
+            break
+        values = [dict(row) for row in rows]
+        if mysql:
+            for year in sorted({row["date_created"].year for row in values} - years):
+                _ensure_partition(archive, year)
+                years.add(year)
+        db.session.execute(archive.insert(), values)
+        db.session.execute(hot.delete().where(hot.c.xid.in_([row["xid"] for row in values])))
+        cache.touch(db.session, hot.name, archive.name)
+        db.session.commit()
+        moved += len(values)
+        last = values[-1]["xid"]
+        if len(values) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def archive(older_than: datetime.timedelta, batch_size: Optional[int] = None, pause: float = 0.0) -> Dict[str, int]:
+    """
+    Archives every event table (see archive_model)
+
+    Args:
+        older_than: age after which rows are archived
+        batch_size: rows per transaction, defaults to ARCHIVE_BATCH_SIZE
+        pause: seconds to sleep between batches
+
+    Returns:
+        dict: table name -> rows archived
+
+    """
+    cutoff = datetime.datetime.utcnow() - older_than
+    return {model.__tablename__: archive_model(model, cutoff, batch_size, pause) for model in ARCHIVES}
+
+
+@app.cli.command("archive")
+@click.option("--older-than", default="180d", show_default=True, help="age of the rows to archive, e.g. 180d or 26w")
+@click.option("--batch-size", type=int, default=None, help="rows per transaction [default: ARCHIVE_BATCH_SIZE]")
+@click.option("--pause", type=float, default=0.0, show_default=True, help="seconds to sleep between batches")
+def archive_command(older_than: str, batch_size: Optional[int], pause: float) -> None:
+    """ Move old event rows into the archive tables """
+    try:
+        age = parse_age(older_than)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--older-than")
+    started = datetime.datetime.utcnow()
+    counts = archive(age, batch_size, pause)
+    for table, count in counts.items():
+        click.echo("{:>12} {}".format(count, table))
+    click.echo("Archived {} rows older than {} in {:.1f}s".format(
+        sum(counts.values()), started - age, (datetime.datetime.utcnow() - started).total_seconds()))
+    if app.config.get("RESPONSE_CACHE_ENABLED", False) and any(counts.values()):
+        click.echo("The server's response cache doesn't see these writes: DELETE /_internal/cache or restart it")
@@ -0,0 +1,229 @@
+from app import app, db
+from flask import request, Response
+from sqlalchemy import event
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+import hashlib
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+"""
+Conditional GET response cache. Every table has a version counter that is bumped when a transaction that wrote to it
+commits. Cached GET routes derive a strong ETag from the request (endpoint, view args, sorted query arguments and
+Accept header) and the versions of the tables the route reads, so If-None-Match can be answered with a 304 before the
+view runs, and full responses are served from a bounded LRU store while those versions are unchanged. If-None-Match
+uses weak comparison, so the weak ETags given to compressed responses (see compression.py) match as well.
+
+Versions live in process memory: enable RESPONSE_CACHE_ENABLED only when a single process serves both the reads and
+the writes (e.g. one threaded worker), otherwise a process will not see writes made by its siblings. Writes made outside
+the server, such as "flask archive", are not seen either; flush() (DELETE /_internal/cache) or a restart invalidates
+everything afterwards.
+"""
+
+_epoch = (0, "")
+_epoch_lock = Lock()
+
+_versions: Dict[str, int] = dict()
+_versions_lock = Lock()
+
+
+def epoch() -> str:
+    """
+    Random per process prefix so ETags (and event ids, see events.py) issued by another process or before a restart
+    never match. Keyed on the pid rather than drawn at import, since workers forked from a preloading master (gunicorn
+    preload_app) would otherwise all share the master's value.
+
+    Returns:
+        str: this process's epoch
+
+    """
+    global _epoch
+    pid = os.getpid()
+    if _epoch[0] != pid:
+        with _epoch_lock:
+            if _epoch[0] != pid:
+                _epoch = (pid, uuid.uuid4().hex)
+    return _epoch[1]
+
+
+class ResponseCache(object):
+    """
+    Thread safe LRU store of response bodies keyed on request key and table versions
+
+    Args:
+        maxsize: maximum number of responses kept
+
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, entry: Tuple[bytes, int, str]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+response_cache = ResponseCache(app.config.get("RESPONSE_CACHE_SIZE", 1024))
+
+
+def versions() -> Dict[str, int]:
+    """
+    Returns:
+        dict: table name -> current version
+
+    """
+    return dict(_versions)
+
+
+def bump(tables: Set[str]) -> None:
+    """
+    Increments the version counters of the given tables, invalidating every cached response that read them
+
+    Args:
+        tables: table names
+
+    Returns:
+        None
+
+    """
+    with _versions_lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+def flush() -> None:
+    """
+    Bumps the version of every table and empties the response store, invalidating all cached responses and ETags of
+    this process. For writes made by other processes (e.g. "flask archive"), which never reach these versions.
+
+    Returns:
+        None
+
+    """
+    bump(set(db.metadata.tables))
+    response_cache.clear()
+
+
+def touch(session: Session, *tables: str) -> None:
+    """
+    Marks tables as written in the session's current transaction; their versions are bumped when it commits. Core
+    statements executed through the session (e.g. bulk inserts) must call this, ORM flushes are tracked automatically.
+
+    Args:
+        session: Sqlalchemy session
+        tables: table names
+
+    Returns:
+        None
+
+    """
+    session.info.setdefault("changed_tables", set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    touch(session, *{inspect(obj).mapper.local_table.name
+                     for obj in list(session.new) + list(session.dirty) + list(session.deleted)})
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    bump(session.info.pop("changed_tables", set()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("changed_tables", None)
+
+
+def _dependencies(models: Tuple[Any, ...]) -> List[str]:
+    """
+    Returns the sorted table names a route built on models reads: the models' own tables and those of every
+    relationship they have, since dumps include related keys or nested objects
+    """
+    tables = set()
+    for model in models:
+        mapper = inspect(model)
+        tables.add(mapper.local_table.name)
+        tables.update(relation.mapper.local_table.name for relation in mapper.relationships)
+    return sorted(tables)
+
+
+def cached(*models: Any) -> Callable:
+    """
+    Decorator for GET views returning responses that only depend on the tables of models (and their relationships).
+    Sets a strong ETag, answers a matching If-None-Match with 304 and serves repeated requests from response_cache.
+    Streamed and non 200 responses are passed through without being stored.
+
+    Args:
+        models: <Sqlalchemy model> classes the view reads
+
+    Returns:
+        Callable: decorator
+
+    """
+    def decorator(view: Callable) -> Callable:
+        tables = list()
+
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not app.config.get("RESPONSE_CACHE_ENABLED", False):
+                return view(*args, **kwargs)
+            if not tables:
+                tables.extend(_dependencies(models))
+
+            key = "|".join([request.endpoint,
+                            repr(sorted(request.view_args.items())),
+                            repr(sorted(request.args.items(multi=True))),
+                            request.headers.get("Accept", "")])
+            current = ",".join("{}={}".format(table, _versions.get(table, 0)) for table in tables)
+            etag = hashlib.sha1("{}|{}|{}".format(epoch(), key, current).encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                entry = response_cache.get(etag)
+                if entry:
+                    body, status, mimetype = entry
+                    response = Response(body, status=status, mimetype=mimetype)
+                else:
+                    response = app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    response_cache.set(etag, (response.get_data(), response.status_code, response.mimetype))
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,119 @@
+from app import app, cache
+from flask import request, Response
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+"""
+Response compression negotiated from Accept-Encoding: brotli when the brotli package is installed and the client
+accepts "br", otherwise gzip. Only responses with a compressible mimetype are considered, buffered responses smaller
+than COMPRESSION_MIN_SIZE bytes are sent as they are, and streamed responses (NDJSON, streamed JSON arrays) are
+compressed chunk by chunk as they are generated, so memory stays bounded. Server-Sent Events are never compressed since
+the compressor would hold events back.
+
+Compressed bodies of responses with a strong ETag (see cache.py) are kept in an LRU keyed on the ETag and encoding, so
+polling clients that don't send If-None-Match don't pay for compressing the same body again. A compressed response gets
+the weak form of the ETag, since the bytes differ from the uncompressed representation; If-None-Match uses weak
+comparison, so conditional requests keep getting 304s.
+"""
+
+""" encodings in order of preference """
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+MIMETYPES = frozenset(app.config.get("COMPRESSION_MIMETYPES", (
+    "application/json", "application/x-ndjson", "text/plain", "text/csv", "text/html", "application/javascript",
+    "text/css")))
+
+compressed_cache = cache.ResponseCache(app.config.get("COMPRESSION_CACHE_SIZE", 256))
+
+
+class _Compressor(object):
+    """ Incremental compressor for one response body with the given content coding """
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=app.config.get("COMPRESSION_BROTLI_QUALITY", 4))
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(app.config.get("COMPRESSION_LEVEL", 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) if self._brotli else self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self._brotli else self._zlib.flush()
+
+
+def negotiate() -> Optional[str]:
+    """
+    Returns:
+        str: the content coding to use for the current request, or None if the client accepts none of ENCODINGS
+
+    """
+    return request.accept_encodings.best_match(ENCODINGS, default=None)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Args:
+        data: response body
+        encoding: "br" or "gzip"
+
+    Returns:
+        bytes: compressed body
+
+    """
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _compress_stream(chunks: Iterable, encoding: str, charset: str) -> Iterator[bytes]:
+    compressor = _Compressor(encoding)
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode(charset)
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    if not app.config.get("COMPRESSION_ENABLED", True) or response.mimetype not in MIMETYPES or \
+            response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or request.method == "HEAD":
+        return response
+    encoding = negotiate()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, response.charset)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < app.config.get("COMPRESSION_MIN_SIZE", 1024):
+            return response
+        etag, weak = response.get_etag()
+        key = "{}|{}".format(etag, encoding) if etag and not weak else None
+        entry = compressed_cache.get(key) if key else None
+        if entry:
+            compressed = entry[0]
+        else:
+            compressed = compress(body, encoding)
+            if key:
+                compressed_cache.set(key, (compressed, response.status_code, response.mimetype))
+        response.set_data(compressed)
+        if etag:
+            response.set_etag(etag, weak=True)
+    response.headers["Content-Encoding"] = encoding
+    return response
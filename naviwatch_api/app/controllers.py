@@ -1,12 +1,18 @@
-from flask import jsonify, request, abort
-from app import app, models, schema, db, documentation
+from flask import jsonify, request, abort, json, Response, stream_with_context, url_for
+from app import app, models, schema, db, documentation, rollup, cache, fulltext, events, writer, poolstats, apidocs, \
+    metrics, querystats, serializer, compression, archive, export
 from flask_cors import CORS
 from flask_accept import accept
-from sqlalchemy import and_, exists
-from marshmallow import ValidationError
+from sqlalchemy import and_, or_, exists, inspect, func, case, Boolean, Integer
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, selectinload, load_only
+from marshmallow import ValidationError, fields
+import base64
+import datetime
+import operator
 import re
-from typing import List, Dict, Tuple, Optional, Union, Type, Any
-from flasgger import Swagger, swag_from
+from typing import List, Dict, Tuple, Optional, Union, Type, Any, Iterator, Callable, Set
 
 
 """
@@ -17,560 +23,1144 @@ CORS(app)
 """
 Swagger
 """
-# set up swagger
-app.config["SWAGGER"] = {"uiversion": 3}
-swagger = Swagger(app, template=documentation.swagger_template)
+# set up swagger (flasgger is loaded on the first /apidocs request, see apidocs.py)
+apidocs.init_docs()
 
 
-def format_search(model: Type[models.Base]) -> List[Any]:
+def parse_datetime(value: str) -> datetime.datetime:
     """
-    Returns a list of SQL Alchemy filter terms based on request arguments. If the request argument key is a valid model column name an
-    SQL Alchemy "like" filter will be generated and appended to filters for return.
+    Parses an ISO 8601 date or datetime request argument. Timezone aware values are converted to naive UTC to match
+    the stored date_created/date_modified values.
 
     Args:
-        model: <Sqlalchemy model>
-    
+        value: ISO 8601 string, e.g. "2019-05-16" or "2019-05-16T13:40:23Z"
+
     Returns:
-        list: [<Sqlalchemy model>.<request.arg.key>.like(<request.arg.value>) if <request.arg.key> in <model.columns>]
+        datetime: naive UTC datetime
+
+    Raises:
+        ValueError: if value is not an ISO 8601 date or datetime
 
     """
-    filters = list()
-    if request.args:
-        for k, v in request.args.items():
-            if k.lower() in model.__table__.columns.keys():
-                if str(model.__table__.columns[k.lower()].type) == "INTEGER":
-                    try:
-                        filters.append(getattr(model, k.lower()) == int(re.sub("[^0-9]", "", v)))
-                    except ValueError as e:
-                        print(e)
-                else:
-                    filters.append(getattr(model, k.lower()).like(v.replace("*", "%")))
-    return filters
+    parsed = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
-def return_result(result: Union[Dict, None]) -> Tuple[Union[str, None], int]:
-    """
-    Helper function to reduce code repetition in routes
+"""
+Filter plans
+"""
+def _coerce_integer(value: str) -> int:
+    return int(re.sub("[^0-9]", "", value))
 
-    Args:
-        result: Dict on which to perform an existence check
 
-    Returns:
-        tuple (json, 200): if o is not None
-        404: if o is of type dict
-    """
-    if result:
-        return jsonify({"__args": request.args, "data": result}), 200
-    else:
-        abort(404)
+def _coerce_boolean(value: str) -> bool:
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError("invalid boolean: '{}'".format(value))
 
 
-@app.route('/')
-def route_default() -> Tuple[str, int]:
-    return jsonify({"message": "peruse controllers.py for valid enpoints/methods",
-                    "data": None}), 200
+def _coerce_pattern(value: str) -> str:
+    return value.replace("*", "%")
 
-######################################################################################################
-############################### PERSON ###############################################################
-######################################################################################################
 
-@app.route('/person/<int:xid>', methods=['DELETE'])
-def route_person_delete(xid: int) -> Tuple[str, int]:
+def _like(column: Any, pattern: str) -> Any:
+    return column.like(pattern)
 
-    person = db.session.query(models.Person).get(int(xid))
-    if person:
-        db.session.delete(person)
-        db.session.commit()
-        return jsonify({"message": "Deleted Person '{}'".format(person.name),
-                        "data": None}), 200
-    else:
-        abort(404)
 
+class FilterPlan(object):
+    """
+    Precompiled request argument filters for one model. Each column is mapped once to the coercer for the raw argument
+    value and the operator applied to the result: integer columns are compared with ==, boolean columns with == after
+    parsing true/false/1/0, and everything else with LIKE using * as a wildcard.
 
-@app.route('/person/', methods=['GET'], endpoint='person_get_all')
-@app.route('/person/<int:xid>', methods=['GET'], endpoint='person_get_xid')
-def route_person_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
+    Args:
+        model: <Sqlalchemy model>
 
-    if xid:
-        return return_result(schema.PersonSchema().dump(db.session.query(models.Person).get(int(xid))))
-    else:
-        return return_result(schema.PersonSchema(many=True).dump(db.session.query(models.Person).filter(and_(*format_search(models.Person))).all()))
+    """
 
+    def __init__(self, model: Type[models.Base]) -> None:
+        self.model = model
+        self.terms = dict()
+        for column in model.__table__.columns:
+            attribute = getattr(model, column.key)
+            if isinstance(column.type, Integer):
+                self.terms[column.key.lower()] = (attribute, _coerce_integer, operator.eq)
+            elif isinstance(column.type, Boolean):
+                self.terms[column.key.lower()] = (attribute, _coerce_boolean, operator.eq)
+            else:
+                self.terms[column.key.lower()] = (attribute, _coerce_pattern, _like)
+
+    def filters(self, args: Dict[str, str]) -> List[Any]:
+        """
+        Args:
+            args: request arguments
+
+        Returns:
+            list: Sqlalchemy filter terms for every argument naming a column; unparseable values are skipped
+
+        """
+        filters = list()
+        for k, v in args.items():
+            term = self.terms.get(k.lower())
+            if term:
+                attribute, coerce, compare = term
+                try:
+                    filters.append(compare(attribute, coerce(v)))
+                except ValueError as e:
+                    print(e)
+        return filters
+
+
+_plans: Dict[Type[models.Base], FilterPlan] = dict()
+
+
+def filter_plan(model: Type[models.Base]) -> FilterPlan:
+    """
+    Returns:
+        FilterPlan: the plan for model, compiled on first use
 
-@app.route('/person/', methods=['POST'])
-@accept('application/json')
-def route_person_post() -> Tuple[str, int]:
+    """
+    if model not in _plans:
+        _plans[model] = FilterPlan(model)
+    return _plans[model]
 
-    if request.get_json():
-        try:
-            person = schema.PersonSchema().load(request.get_json())
-            db.session.add(person)
-            db.session.commit()
-            return return_result(schema.PersonSchema().dump(person))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+def format_search(model: Type[models.Base]) -> List[Any]:
+    """
+    Returns a list of SQL Alchemy filter terms based on request arguments, using the model's FilterPlan for arguments
+    that name a column. The "since" and "until" arguments become date_created >= since and date_created < until range
+    filters, which the (pet_xid, date_created) indexes on the event tables can serve. Aborts with 400 if either is not
+    an ISO 8601 date or datetime.
 
+    Args:
+        model: <Sqlalchemy model>
+    
+    Returns:
+        list: [<Sqlalchemy model>.<request.arg.key> <operator> <request.arg.value>
+               if <request.arg.key> in <model.columns>]
+
+    """
+    filters = list()
+    if request.args:
+        filters.extend(filter_plan(model).filters(request.args))
+        try:
+            if request.args.get("since"):
+                filters.append(model.date_created >= parse_datetime(request.args["since"]))
+            if request.args.get("until"):
+                filters.append(model.date_created < parse_datetime(request.args["until"]))
+        except ValueError as e:
+            print(e)
+            abort(400)
+    return filters
 
-@app.route('/person/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_person_put(xid: int) -> Tuple[str, int]:
 
-    if request.json:
-        person = db.session.query(models.Person).get(int(xid))
-        if person:
-            try:
-                person = schema.PersonSchema().load(request.json,
-                                                  instance=person)
-                db.session.add(person)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
+def load_columns(model: Type[models.Base], names: Set[str]) -> List[Any]:
+    """
+    Maps schema field names to the columns that have to be loaded to dump them: columns load themselves and many-to-one
+    relations load their foreign key. The primary key is always loaded.
 
-        return return_result(schema.PersonSchema().dump(person))
+    Args:
+        model: <Sqlalchemy model>
+        names: field names
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+    Returns:
+        list: column attributes for load_only
 
-######################################################################################################
-################################## PET ###############################################################
-######################################################################################################
+    """
+    mapper = inspect(model)
+    columns = {"xid"}
+    for name in names:
+        if name in mapper.column_attrs:
+            columns.add(name)
+        elif name in mapper.relationships and not mapper.relationships[name].uselist:
+            columns.update(column.key for column in mapper.relationships[name].local_columns)
+    return [getattr(model, column) for column in sorted(columns)]
 
-@app.route('/pet/<int:xid>', methods=['DELETE'])
-def route_pet_delete(xid: int) -> Tuple[str, int]:
 
-    pet = db.session.query(models.Pet).get(int(xid))
-    if pet:
-        db.session.delete(pet)
-        db.session.commit()
-        return jsonify({"message": "Deleted Pet '{}'".format(pet.name),
-                        "data": None}), 200
-    else:
-        abort(404)
+"""
+Keyset pagination
+"""
+PAGINATION_ORDERS = ("xid", "date_created")
 
 
-@app.route('/pet/', methods=['GET'], endpoint='pet_get_all')
-def route_pet_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
+def encode_cursor(order: str, row: models.Base) -> str:
+    """
+    Builds an opaque cursor pointing just past the given row for the given sort order; a NULL date_created is encoded
+    as null
 
+    Args:
+        order: one of PAGINATION_ORDERS
+        row: <Sqlalchemy model> instance or result row (with xid and date_created) of the last row on the current page
 
-    if xid:
-        return return_result(schema.PetSchema().dump(db.session.query(models.Pet).get(int(xid))))
-    else:
-        return return_result(schema.PetSchema(many=True).dump(db.session.query(models.Pet).filter(and_(*format_search(models.Pet))).all()))
+    Returns:
+        str: url safe cursor string
 
+    """
+    key = [order, row.xid]
+    if order == "date_created":
+        key.append(row.date_created.isoformat() if row.date_created is not None else None)
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
 
-@app.route('/pet/', methods=['POST'])
-@accept('application/json')
-def route_pet_post() -> Tuple[str, int]:
 
-    if request.get_json():
-        try:
-            pet = schema.PetSchema().load(request.get_json())
-            db.session.add(pet)
-            db.session.commit()
-            return return_result(schema.PetSchema().dump(pet))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
+def decode_cursor(order: str, cursor: str) -> List[Any]:
+    """
+    Reverses encode_cursor. Aborts with 400 if the cursor is malformed or was issued for a different sort order
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+    Args:
+        order: one of PAGINATION_ORDERS
+        cursor: cursor string previously returned in the "next" key of a page
 
+    Returns:
+        list: [xid] or [xid, date_created (None for a row without one)]
 
-@app.route('/pet/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_pet_put(xid: int) -> Tuple[str, int]:
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if key[0] != order:
+            raise ValueError("cursor was issued for order '{}'".format(key[0]))
+        if order == "date_created":
+            return [int(key[1]), datetime.datetime.fromisoformat(key[2]) if key[2] is not None else None]
+        return [int(key[1])]
+    except (ValueError, TypeError, IndexError, UnicodeDecodeError) as e:
+        print(e)
+        abort(400)
+
+
+def page_limit() -> int:
+    """
+    Returns:
+        int: the "limit" request argument (PAGINATION_DEFAULT_LIMIT if absent) clamped to [1, PAGINATION_MAX_LIMIT]
 
-    if request.json:
-        pet = db.session.query(models.Pet).get(int(xid))
-        if pet:
-            try:
-                pet = schema.PetSchema().load(request.json,
-                                                  instance=pet)
-                db.session.add(pet)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
+    """
+    try:
+        limit = int(request.args.get("limit", app.config.get("PAGINATION_DEFAULT_LIMIT", 100)))
+    except ValueError:
+        abort(400)
+    return max(1, min(limit, app.config.get("PAGINATION_MAX_LIMIT", 1000)))
 
-        return return_result(schema.PetSchema().dump(pet))
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+def paginate(query: Query, model: Type[models.Base]) -> Tuple[List[models.Base], Optional[Dict]]:
+    """
+    Applies keyset pagination to query if the request has a "limit" or "cursor" argument. Pages are ordered on
+    "order_by" (xid or date_created, xid as tie breaker) and seek past the cursor with WHERE clauses instead of OFFSET,
+    so every page costs the same regardless of depth. Rows without a date_created come first when ordering on it, as
+    MySQL and SQLite sort NULLs first.
 
-######################################################################################################
-################################# FOOD ###############################################################
-######################################################################################################
+    Args:
+        query: filtered <Sqlalchemy query> for model
+        model: <Sqlalchemy model>
 
-@app.route('/food/<int:xid>', methods=['DELETE'])
-def route_food_delete(xid: int) -> Tuple[str, int]:
+    Returns:
+        tuple (list, None): all rows if the request is not paginated
+        tuple (list, dict): one page of rows and {"next": <cursor or None if this is the last page>}
 
-    food = db.session.query(models.Food).get(int(xid))
-    if food:
-        db.session.delete(food)
-        db.session.commit()
-        return jsonify({"message": "Deleted Food '{}'".format(food.name),
-                        "data": None}), 200
+    """
+    if "limit" not in request.args and "cursor" not in request.args:
+        return query.all(), None
+
+    order = request.args.get("order_by", "xid").lower()
+    if order not in PAGINATION_ORDERS:
+        abort(400)
+    limit = page_limit()
+
+    if order == "date_created":
+        if request.args.get("cursor"):
+            xid, created = decode_cursor(order, request.args["cursor"])
+            if created is None:
+                query = query.filter(or_(model.date_created.isnot(None),
+                                         and_(model.date_created.is_(None), model.xid > xid)))
+            else:
+                query = query.filter(or_(model.date_created > created,
+                                         and_(model.date_created == created, model.xid > xid)))
+        query = query.order_by(model.date_created, model.xid)
     else:
-        abort(404)
+        if request.args.get("cursor"):
+            xid, = decode_cursor(order, request.args["cursor"])
+            query = query.filter(model.xid > xid)
+        query = query.order_by(model.xid)
 
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], {"next": encode_cursor(order, rows[limit - 1])}
+    return rows, {"next": None}
 
-@app.route('/food/', methods=['GET'], endpoint='food_get_all')
-def route_food_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
 
+"""
+Streaming
+"""
+NDJSON = "application/x-ndjson"
 
-    if xid:
-        return return_result(schema.FoodSchema().dump(db.session.query(models.Food).get(int(xid))))
-    else:
-        return return_result(schema.FoodSchema(many=True).dump(db.session.query(models.Food).filter(and_(*format_search(models.Food))).all()))
 
+def wants_stream() -> bool:
+    """
+    Checks whether the client asked for a streamed collection, either NDJSON via the Accept header or a streamed JSON
+    array via the "stream" request argument
 
-@app.route('/food/', methods=['POST'])
-@accept('application/json')
-def route_food_post() -> Tuple[str, int]:
+    Returns:
+        bool: True if the response should be streamed
 
-    if request.get_json():
-        try:
-            food = schema.FoodSchema().load(request.get_json())
-            db.session.add(food)
-            db.session.commit()
-            return return_result(schema.FoodSchema().dump(food))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
+    """
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON or \
+        request.args.get("stream", "").lower() in ("1", "true", "yes")
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
 
+def wants_archive() -> bool:
+    """
+    Returns:
+        bool: True if the "include_archive" request argument asks for archived rows to be included (see archive.py)
 
-@app.route('/food/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_food_put(xid: int) -> Tuple[str, int]:
+    """
+    return request.args.get("include_archive", "").lower() in ("1", "true", "yes")
 
-    if request.json:
-        food = db.session.query(models.Food).get(int(xid))
-        if food:
-            try:
-                food = schema.FoodSchema().load(request.json,
-                                                  instance=food)
-                db.session.add(food)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
 
-        return return_result(schema.FoodSchema().dump(food))
+def stream_result(query: Query, dump: Callable[[Any], Dict]) -> Response:
+    """
+    Streams a collection query row by row instead of building the full list, dump and JSON string in memory. Rows are
+    fetched in batches of STREAM_BATCH_SIZE with yield_per and serialized one at a time through dump, so memory stays
+    flat regardless of result size. Pagination arguments are ignored. The query must not eager load collections: with
+    yield_per the result cursor stays open (a server side cursor on MySQL) while rows are consumed, so selectinload
+    queries can't run alongside it; expanded collections are rejected before streaming.
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+    NDJSON (one object per line) is produced if the client accepts application/x-ndjson, otherwise the usual
+    {"__args": ..., "data": [...]} envelope is streamed as a JSON array.
 
-######################################################################################################
-################################ WATER ###############################################################
-######################################################################################################
+    Args:
+        query: filtered <Sqlalchemy query>
+        dump: function turning one row of query into a dict, e.g. a schema's dump
 
-@app.route('/water/<int:xid>', methods=['DELETE'])
-def route_water_delete(xid: int) -> Tuple[str, int]:
+    Returns:
+        Response: chunked flask response
 
-    water = db.session.query(models.Water).get(int(xid))
-    if water:
-        db.session.delete(water)
-        db.session.commit()
-        return jsonify({"message": "Deleted Water '{}'".format(water.name),
-                        "data": None}), 200
-    else:
-        abort(404)
+    """
+    rows = query.yield_per(app.config.get("STREAM_BATCH_SIZE", 1000))
 
+    def ndjson() -> Iterator[str]:
+        for row in rows:
+            yield json.dumps(dump(row)) + "\n"
 
-@app.route('/water/', methods=['GET'], endpoint='water_get_all')
-def route_water_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
+    def array() -> Iterator[str]:
+        yield '{{"__args": {}, "data": ['.format(json.dumps(request.args))
+        separator = ""
+        for row in rows:
+            yield separator + json.dumps(dump(row))
+            separator = ","
+        yield "]}\n"
 
+    if request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON:
+        return Response(stream_with_context(ndjson()), mimetype=NDJSON)
+    return Response(stream_with_context(array()), mimetype="application/json")
 
-    if xid:
-        return return_result(schema.WaterSchema().dump(db.session.query(models.Water).get(int(xid))))
-    else:
-        return return_result(schema.WaterSchema(many=True).dump(db.session.query(models.Water).filter(and_(*format_search(models.Water))).all()))
 
+def return_result(result: Union[Dict, None], page: Optional[Dict] = None,
+                  plain: bool = False) -> Tuple[Union[str, None], int]:
+    """
+    Helper function to reduce code repetition in routes
 
-@app.route('/water/', methods=['POST'])
-@accept('application/json')
-def route_water_post() -> Tuple[str, int]:
+    Args:
+        result: Dict on which to perform an existence check
+        page: optional pagination keys (see paginate) merged into the response
+        plain: result only holds str, int, bool and None values (see serializer.encode)
 
-    if request.get_json():
-        try:
-            water = schema.WaterSchema().load(request.get_json())
-            db.session.add(water)
-            db.session.commit()
-            return return_result(schema.WaterSchema().dump(water))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
+    Returns:
+        tuple (json, 200): if o is not None
+        404: if o is of type dict
+    """
+    if result:
+        response = {"__args": request.args, "data": result}
+        if page:
+            response.update(page)
+        if plain:
+            response["__args"] = request.args.to_dict()
+            return serializer.jsonify(response, plain=True), 200
+        return jsonify(response), 200
+    else:
+        abort(404)
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
 
+@app.route('/_internal/cache', methods=['GET'])
+def route_internal_cache() -> Tuple[str, int]:
+    return jsonify({"message": None,
+                    "data": dict(cache.response_cache.stats(), versions=cache.versions(),
+                                 compressed=compression.compressed_cache.stats())}), 200
 
-@app.route('/water/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_water_put(xid: int) -> Tuple[str, int]:
 
-    if request.json:
-        water = db.session.query(models.Water).get(int(xid))
-        if water:
-            try:
-                water = schema.WaterSchema().load(request.json,
-                                                  instance=water)
-                db.session.add(water)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
+@app.route('/_internal/cache', methods=['DELETE'], endpoint='internal_cache_flush')
+def route_internal_cache_flush() -> Tuple[str, int]:
+    """ Invalidates every cached response and ETag of this process, e.g. after "flask archive" """
+    cache.flush()
+    return jsonify({"message": "Flushed response cache",
+                    "data": None}), 200
 
-        return return_result(schema.WaterSchema().dump(water))
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+@app.route('/metrics', methods=['GET'])
+def route_metrics() -> Response:
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-######################################################################################################
-############################### ACTIVITIES ###########################################################
-######################################################################################################
 
-@app.route('/activities/<int:xid>', methods=['DELETE'])
-def route_activities_delete(xid: int) -> Tuple[str, int]:
+@app.route('/_internal/pool', methods=['GET'])
+def route_internal_pool() -> Tuple[str, int]:
+    return jsonify({"message": None,
+                    "data": poolstats.stats(db.engine)}), 200
 
-    activities = db.session.query(models.Activities).get(int(xid))
-    if activities:
-        db.session.delete(activities)
-        db.session.commit()
-        return jsonify({"message": "Deleted Activities '{}'".format(activities.name),
-                        "data": None}), 200
-    else:
-        abort(404)
 
+@app.route('/_internal/writes', methods=['GET'])
+def route_internal_writes() -> Tuple[str, int]:
+    return jsonify({"message": None,
+                    "data": writer.writer.stats()}), 200
 
-@app.route('/activities/', methods=['GET'], endpoint='activities_get_all')
-def route_activities_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
 
+@app.route('/writes/<tracking_id>', methods=['GET'])
+def route_writes_status(tracking_id: str) -> Tuple[str, int]:
+    """
+    Status of a write accepted by the write queue
+    ---
+    tags:
+      - Writes
+    parameters:
+      - name: tracking_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: status is "queued", "committed" (with xid) or "failed" (with error)
+      404:
+        description: unknown or expired tracking id
+    """
+    status = writer.writer.status(tracking_id)
+    if status is None:
+        abort(404)
+    return jsonify({"message": None,
+                    "data": status}), 200
 
-    if xid:
-        return return_result(schema.ActivitiesSchema().dump(db.session.query(models.Activities).get(int(xid))))
-    else:
-        return return_result(schema.ActivitiesSchema(many=True).dump(db.session.query(models.Activities).filter(and_(*format_search(models.Activities))).all()))
 
+@app.route('/')
+def route_default() -> Tuple[str, int]:
+    return jsonify({"message": "peruse controllers.py for valid enpoints/methods",
+                    "data": None}), 200
 
-@app.route('/activities/', methods=['POST'])
-@accept('application/json')
-def route_activities_post() -> Tuple[str, int]:
 
-    if request.get_json():
-        try:
-            activities = schema.ActivitiesSchema().load(request.get_json())
-            db.session.add(activities)
-            db.session.commit()
-            return return_result(schema.ActivitiesSchema().dump(activities))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
+@app.route('/events/stream', methods=['GET'])
+def route_events_stream() -> Response:
+    """
+    Server-Sent Events feed of committed creates, updates and deletes
+    Optional ?pet_xid= and ?table= restrict the feed to one pet and/or table. Reconnecting clients resume after the
+    Last-Event-ID header (or ?last_event_id=) as long as that event is still buffered by this process, otherwise a
+    "reset" event is sent first.
+    ---
+    tags:
+      - Events
+    produces:
+      - text/event-stream
+    parameters:
+      - name: pet_xid
+        in: query
+        type: integer
+      - name: table
+        in: query
+        type: string
+      - name: Last-Event-ID
+        in: header
+        type: string
+    responses:
+      200:
+        description: event stream
+    """
+    pet_xid = request.args.get("pet_xid", type=int)
+    table = request.args.get("table")
+    last_event_id = request.headers.get("Last-Event-ID", request.args.get("last_event_id"))
+    response = Response(events.stream(last_event_id, pet_xid, table), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+"""
+Resource registry
+"""
+class Resource(object):
+    """
+    One entity served by the generic CRUD views: GET (collection and by xid), POST, PUT and DELETE, PUT by-<key> upserts
+    for models with a unique column, plus POST _bulk for event tables. Everything derived from the model and schema
+    (filter plan, relationship and column metadata, dump schema instances) is computed once when the resource is
+    registered rather than on every request.
 
+    Args:
+        name: url and endpoint prefix, e.g. "toilet" serves /toilet/ with endpoint toilet_get_all
+        model: <Sqlalchemy model>
+        schema_cls: marshmallow schema class for model
+        label: name used in response messages, defaults to the model name
+        bulk: also register POST /<name>/_bulk
+        queued: POST goes through the write queue (see writer.py) when WRITE_QUEUE_ENABLED
+        docs: optional flasgger specs keyed by "get_all", "get_xid", "post", "put" and "delete"
 
-@app.route('/activities/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_activities_put(xid: int) -> Tuple[str, int]:
+    """
 
-    if request.json:
-        activities = db.session.query(models.Activities).get(int(xid))
-        if activities:
+    def __init__(self,
+                 name: str,
+                 model: Type[models.Base],
+                 schema_cls: Type[schema.BaseSchema],
+                 label: Optional[str] = None,
+                 bulk: bool = False,
+                 queued: bool = False,
+                 docs: Optional[Dict[str, Dict]] = None) -> None:
+        self.name = name
+        self.model = model
+        self.schema_cls = schema_cls
+        self.label = label or model.__name__
+        self.bulk = bulk
+        self.queued = queued
+        self.docs = docs or dict()
+        self.plan = filter_plan(model)
+
+        mapper = inspect(model)
+        dump_fields = schema_cls().fields
+        self.collections = [relation.key for relation in mapper.relationships
+                            if relation.uselist and relation.key in dump_fields]
+        self.references = {relation.key: (list(relation.local_columns)[0].key, relation.mapper.class_)
+                           for relation in mapper.relationships if not relation.uselist}
+        self.columns = [column.key for column in model.__table__.columns if column.key != "xid"]
+        self.natural_key = next((column.key for column in model.__table__.columns if column.unique), None)
+        self._schemas = dict()
+        self._serializers = dict()
+
+        self.fields = set(dump_fields)
+        self.nested_fields = {key: set(field.schema.fields) for key, field in dump_fields.items()
+                              if key in self.collections and isinstance(field, fields.Nested)}
+
+    def dump_schema(self, many: bool = False, exclude: Optional[Tuple[str, ...]] = None,
+                    only: Optional[Tuple[str, ...]] = None) -> schema.BaseSchema:
+        """
+        Returns a cached schema instance for dumping. Loading always uses a new instance since ModelSchema.load keeps
+        per call state on the instance.
+
+        Args:
+            many: dump a list of rows
+            exclude: field names to leave out, defaults to every collection relationship
+            only: field names to dump (dotted for fields of nested collections), defaults to all of them
+
+        Returns:
+            BaseSchema: schema instance
+
+        """
+        exclude = tuple(self.collections) if exclude is None else exclude
+        key = (many, exclude, only)
+        if key not in self._schemas:
+            instance = self.schema_cls(many=many, exclude=exclude, only=only)
+            if only is not None and len(self._schemas) >= 256:
+                # every combination of ?fields= is a different schema, only keep a bounded number of them
+                return instance
+            self._schemas[key] = instance
+        return self._schemas[key]
+
+    def compiled_serializer(self, exclude: Tuple[str, ...], only: Optional[Tuple[str, ...]],
+                            required: bool = False) -> Optional[serializer.Serializer]:
+        """
+        Returns the compiled serializer for the row dump schema with these exclusions and fields (see serializer.py),
+        or None if the schema can't be compiled or FAST_SERIALIZER_ENABLED is off (and required is False)
+
+        """
+        if not required and not app.config.get("FAST_SERIALIZER_ENABLED", True):
+            return None
+        key = (exclude, only)
+        if key not in self._serializers:
+            compiled = serializer.compile_schema(self.dump_schema(exclude=exclude, only=only))
+            if only is not None and len(self._serializers) >= 256:
+                return compiled
+            self._serializers[key] = compiled
+        return self._serializers[key]
+
+    def expand(self) -> Tuple[List[Any], Tuple[str, ...]]:
+        """
+        Parses the comma separated "expand" request argument into loader options and schema exclusions. Expanded
+        collection relationships are fetched up front with one selectinload query each instead of one lazy query per
+        row; collections that were not expanded are excluded from the schema so they are never loaded or serialized.
+        "expand=all" expands every collection. Aborts with 400 on unknown relation names.
+
+        Returns:
+            tuple (list, tuple): Sqlalchemy query options, field names to exclude from the schema dump
+
+        """
+        expand = {key.strip().lower() for key in request.args.get("expand", "").split(",") if key.strip()}
+        if "all" in expand:
+            expand = set(self.collections)
+        if not expand.issubset(self.collections):
+            abort(400)
+        return [selectinload(getattr(self.model, key)) for key in self.collections if key in expand], \
+            tuple(key for key in self.collections if key not in expand)
+
+    def sparse_fields(self) -> Tuple[List[Any], Tuple[str, ...], Optional[Tuple[str, ...]]]:
+        """
+        Combines "expand" with the comma separated "fields" request argument (a sparse fieldset, e.g.
+        "fields=xid,act_type,date_created"). Only the requested fields are dumped, and only the columns behind them are
+        selected with load_only. Fields of a collection are requested with a dotted name ("fields=xid,food.foodtype"),
+        which expands the collection and loads only those columns of it; naming a collection expands it in full.
+        Without "fields" this is the same as expand(). Aborts with 400 on unknown field names.
+
+        Returns:
+            tuple (list, tuple, tuple): Sqlalchemy query options, field names to exclude from the schema dump, field
+            names to dump (None for all)
+
+        """
+        options, exclude = self.expand()
+        requested = {key.strip() for key in request.args.get("fields", "").split(",") if key.strip()}
+        if not requested:
+            return options, exclude, None
+
+        top = set()
+        nested = dict()
+        for name in requested:
+            key, _, field = name.partition(".")
+            if key not in self.fields or field and field not in self.nested_fields.get(key, ()):
+                abort(400)
+            top.add(key)
+            if field:
+                nested.setdefault(key, set()).add(field)
+        expanded = {key for key in self.collections if key not in exclude or key in top}
+        only = top | expanded | {"{}.{}".format(key, field) for key, names in nested.items() for field in names}
+
+        columns = set(top)
+        if request.args.get("order_by", "").lower() == "date_created":
+            columns.add("date_created")
+        options = [load_only(*load_columns(self.model, columns))]
+        for key in self.collections:
+            if key in expanded:
+                loader = selectinload(getattr(self.model, key))
+                if key in nested:
+                    loader = loader.load_only(*load_columns(self.model_for(key), nested[key]))
+                options.append(loader)
+        return options, tuple(key for key in self.collections if key not in expanded), tuple(sorted(only))
+
+    def model_for(self, collection: str) -> Type[models.Base]:
+        """
+        Returns:
+            <Sqlalchemy model>: the model on the other side of a collection relationship
+
+        """
+        return inspect(self.model).relationships[collection].mapper.class_
+
+    def integrity_error(self, err: IntegrityError, status: int) -> Tuple[str, int]:
+        """
+        Rolls back and turns a failed write into an error response. Violations of the natural key's unique constraint
+        get the same "<Model> with Name '<name>' already exists" message the schemas used to raise before the insert.
+
+        Args:
+            err: error raised by the commit
+            status: HTTP status code for a natural key conflict
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        db.session.rollback()
+        message = str(err.orig)
+        if self.natural_key and ("UNIQUE" in message.upper() or getattr(err.orig, "args", [None])[0] == 1062):
+            value = (request.view_args or dict()).get("value") or \
+                (request.get_json(silent=True) or dict()).get(self.natural_key)
+            return jsonify({"error": {self.natural_key: ["{} with {} '{}' already exists".format(
+                                self.model.__name__, self.natural_key.capitalize(), value)]},
+                            "data": None}), status
+        return jsonify({"error": message,
+                        "data": None}), 422
+
+    def load_row(self, row: Dict[str, Any], loader: schema.BaseSchema) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+        """
+        Validates one JSON object into column values without touching the session. Many-to-one relations may be given
+        by name (e.g. "pet") or by foreign key (e.g. "pet_xid"); the referenced rows are not checked here.
+
+        Args:
+            row: JSON object
+            loader: schema instance excluding the many-to-one relations and xid
+
+        Returns:
+            tuple (dict, dict): values of the columns present in row, field errors
+
+        """
+        if not isinstance(row, dict):
+            return dict(), {"_schema": ["Invalid input type."]}
+        row = dict(row)
+        errors = dict()
+        for key, (fk, _) in self.references.items():
+            if key in row:
+                row[fk] = row.pop(key)
+            if row.get(fk) is not None:
+                try:
+                    row[fk] = int(row[fk])
+                except (TypeError, ValueError):
+                    errors[fk] = ["Not a valid integer."]
+        try:
+            instance = loader.load(row)
+        except ValidationError as err:
+            errors.update(err.messages)
+        if errors:
+            return dict(), errors
+        return {column: getattr(instance, column) for column in self.columns if column in row}, errors
+
+    def get(self, xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
+        """
+        Retrieves the record specified by xid, or the collection matching the request arguments. With "q" the
+        collection is full-text searched and the best "limit" matches are returned in order of relevance.
+
+        Args:
+            xid: integer identifier of record
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        options, exclude, only = self.sparse_fields()
+        if self.model in archive.ARCHIVES and wants_archive():
+            return self.get_with_archive(xid, exclude, only)
+        if xid:
+            return return_result(self.dump_schema(exclude=exclude, only=only).dump(
+                db.session.query(self.model).options(*options).get(int(xid))))
+        query = db.session.query(self.model).filter(and_(*format_search(self.model)))
+        if request.args.get("q"):
+            query = fulltext.search(query, self.model, request.args["q"])
+        compiled = self.compiled_serializer(exclude, only)
+        if compiled:
+            query = query.with_entities(*compiled.columns)
+        else:
+            query = query.options(*options)
+        if wants_stream():
+            if set(self.collections) - set(exclude):
+                # eager loaders can't run while yield_per holds the cursor open (see stream_result)
+                abort(400)
+            return stream_result(query,
+                                 compiled.dump if compiled else self.dump_schema(exclude=exclude, only=only).dump)
+        if request.args.get("q"):
+            rows, page = query.limit(page_limit()).all(), None
+        else:
+            rows, page = paginate(query, self.model)
+        if compiled:
+            return return_result(compiled.dump_many(rows), page, plain=compiled.plain)
+        return return_result(self.dump_schema(many=True, exclude=exclude, only=only).dump(rows), page)
+
+    def get_with_archive(self, xid: Optional[int], exclude: Tuple[str, ...],
+                         only: Optional[Tuple[str, ...]]) -> Tuple[str, int]:
+        """
+        get() over the model's table and its archive table (see archive.py), read as a UNION ALL of result rows and
+        dumped with the compiled serializer. Filters, pagination and streaming work as usual; full-text search is not
+        available on archived rows and aborts with 400.
+
+        Args:
+            xid: integer identifier of record
+            exclude: field names to leave out
+            only: field names to dump
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        compiled = self.compiled_serializer(exclude, only, required=True)
+        if compiled is None or request.args.get("q"):
+            abort(400)
+        archived = archive.ARCHIVES[self.model]
+        if xid:
+            filters, archived_filters = [self.model.xid == int(xid)], [archived.xid == int(xid)]
+        else:
+            filters, archived_filters = format_search(self.model), format_search(archived)
+        query = db.session.query(*compiled.columns).filter(and_(*filters)).union_all(
+            db.session.query(*[getattr(archived, column.key) for column in compiled.columns])
+            .filter(and_(*archived_filters)))
+        if xid:
+            row = query.first()
+            return return_result(compiled.dump(row) if row else None, plain=compiled.plain)
+        if wants_stream():
+            return stream_result(query, compiled.dump)
+        rows, page = paginate(query, self.model)
+        return return_result(compiled.dump_many(rows), page, plain=compiled.plain)
+
+    def post(self) -> Tuple[str, int]:
+        """
+        Creates a record from posted JSON (if it exists). Uniqueness is left to the database: the insert is attempted
+        directly and a unique constraint violation is reported as a validation error.
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        if self.queued and app.config.get("WRITE_QUEUE_ENABLED", False):
+            return self.enqueue()
+        if request.get_json():
             try:
-                activities = schema.ActivitiesSchema().load(request.json,
-                                                  instance=activities)
-                db.session.add(activities)
+                obj = self.schema_cls().load(request.get_json())
+                db.session.add(obj)
                 db.session.commit()
+                return return_result(self.dump_schema().dump(obj))
             except ValidationError as err:
                 return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
+                                "data": None}), 422
+            except IntegrityError as err:
+                return self.integrity_error(err, 422)
 
-        return return_result(schema.ActivitiesSchema().dump(activities))
+        return jsonify({"error": "No JSON data received",
+                        "data": None}), 422
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
-
-######################################################################################################
-############################### TOILET ###############################################################
-######################################################################################################
-
-@app.route('/toilet/<int:xid>', methods=['DELETE'])
-def route_toilet_delete(xid: int) -> Tuple[str, int]:
-
-    toilet = db.session.query(models.Toilet).get(int(xid))
-    if toilet:
-        db.session.delete(toilet)
-        db.session.commit()
-        return jsonify({"message": "Deleted Toilet '{}'".format(toilet.name),
-                        "data": None}), 200
-    else:
-        abort(404)
+    def enqueue(self) -> Tuple[str, int]:
+        """
+        Validates posted JSON and hands it to the background writer instead of committing in the request. Responds
+        202 with a tracking id whose status is served by /writes/<tracking_id>, or 503 if the queue is full.
 
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
 
-@app.route('/toilet/', methods=['GET'], endpoint='toilet_get_all')
-def route_toilet_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
-
-
-    if xid:
-        return return_result(schema.ToiletSchema().dump(db.session.query(models.Toilet).get(int(xid))))
-    else:
-        return return_result(schema.ToiletSchema(many=True).dump(db.session.query(models.Toilet).filter(and_(*format_search(models.Toilet))).all()))
+        """
+        payload = request.get_json()
+        if not payload:
+            return jsonify({"error": "No JSON data received",
+                            "data": None}), 422
+        values, errors = self.load_row(payload, self.schema_cls(exclude=tuple(self.references) + ("xid",)))
+        if errors:
+            return jsonify({"error": errors,
+                            "data": None}), 422
 
+        values["date_created"] = values.get("date_created") or datetime.datetime.utcnow()
+        tracking_id = writer.writer.submit(self.model, values)
+        if tracking_id is None:
+            response = jsonify({"error": "Write queue is full",
+                                "data": None})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        response = jsonify({"message": "Queued {}".format(self.label),
+                            "data": {"tracking_id": tracking_id}})
+        response.headers["Location"] = url_for("route_writes_status", tracking_id=tracking_id)
+        return response, 202
+
+    def put(self, xid: int) -> Tuple[str, int]:
+        """
+        Updates the record specified by xid from posted JSON (if it exists)
+
+        Args:
+            xid: integer identifier of record
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        if request.json:
+            obj = db.session.query(self.model).get(int(xid))
+            if obj:
+                try:
+                    obj = self.schema_cls().load(request.json,
+                                                 instance=obj)
+                    db.session.add(obj)
+                    db.session.commit()
+                except ValidationError as err:
+                    return jsonify({"error": err.messages,
+                                    "data": None}), 409 if "name" in err.messages.keys() else 422
+                except IntegrityError as err:
+                    return self.integrity_error(err, 409)
+
+            return return_result(self.dump_schema().dump(obj))
+
+        return jsonify({"error": "No JSON data received",
+                        "data": None}), 422
+
+    def delete(self, xid: int) -> Tuple[str, int]:
+        """
+        Deletes the record specified by xid
+
+        Args:
+            xid: integer identifier of record
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        obj = db.session.query(self.model).get(int(xid))
+        if obj:
+            db.session.delete(obj)
+            db.session.commit()
+            return jsonify({"message": "Deleted {} '{}'".format(self.label, getattr(obj, "name", obj.xid)),
+                            "data": None}), 200
+        else:
+            abort(404)
+
+    def bulk_post(self) -> Tuple[str, int]:
+        """
+        Inserts a JSON array of records in a single transaction. Every row is validated through the schema first, all
+        referenced foreign keys (e.g. pet_xid/person_xid, or pet/person) are checked with one IN query per related
+        model and the rows are then written with multi-row core INSERT statements of at most BULK_INSERT_CHUNK_SIZE
+        rows.
+
+        Nothing is inserted if any row fails validation; the error response is keyed by row index. A constraint
+        violation during the insert (e.g. a referenced row deleted after the check) rolls everything back with a 422.
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        rows = request.get_json()
+        if not isinstance(rows, list) or not rows:
+            return jsonify({"error": "Expected a non-empty JSON array",
+                            "data": None}), 422
+        max_rows = app.config.get("BULK_MAX_ROWS", 10000)
+        if len(rows) > max_rows:
+            return jsonify({"error": "At most {} rows may be posted at once".format(max_rows),
+                            "data": None}), 422
 
-@app.route('/toilet/', methods=['POST'])
-@accept('application/json')
-def route_toilet_post() -> Tuple[str, int]:
+        loader = self.schema_cls(exclude=tuple(self.references) + ("xid",))
+        errors = dict()
+        values = list()
+        for index, row in enumerate(rows):
+            value, row_errors = self.load_row(row, loader)
+            if row_errors:
+                errors[index] = row_errors
+                continue
+            values.append((index, dict({column: None for column in self.columns}, **value)))
+
+        for fk, related in self.references.values():
+            wanted = {value[fk] for _, value in values if value[fk] is not None}
+            if wanted:
+                found = {xid for xid, in db.session.query(related.xid).filter(related.xid.in_(wanted))}
+                for index, value in values:
+                    if value[fk] is not None and value[fk] not in found:
+                        errors.setdefault(index, dict())[fk] = ["{} {} does not exist".format(related.__name__,
+                                                                                             value[fk])]
+
+        if errors:
+            return jsonify({"error": errors,
+                            "data": None}), 422
 
-    if request.get_json():
+        now = datetime.datetime.utcnow()
+        values = [value for _, value in values]
+        for value in values:
+            if value["date_created"] is None:
+                value["date_created"] = now
+        chunk = app.config.get("BULK_INSERT_CHUNK_SIZE", 500)
         try:
-            toilet = schema.ToiletSchema().load(request.get_json())
-            db.session.add(toilet)
+            for start in range(0, len(values), chunk):
+                db.session.execute(self.model.__table__.insert().values(values[start:start + chunk]))
+            cache.touch(db.session, self.model.__tablename__)
+            rollup.record_inserts(db.session, self.model, values)
+            for value in values:
+                # multi-row inserts don't return the generated keys, so these events carry no xid
+                events.record(db.session, "created", self.model.__tablename__, value, value.get("pet_xid"))
             db.session.commit()
-            return return_result(schema.ToiletSchema().dump(toilet))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
+        except IntegrityError as err:
+            # e.g. a referenced row deleted after the foreign key check
+            return self.integrity_error(err, 422)
+        return jsonify({"message": "Inserted {} {}".format(len(values), self.label),
+                        "data": {"inserted": len(values)}}), 200
+
+    def upsert(self, value: str) -> Tuple[str, int]:
+        """
+        Creates or updates the record whose natural key (e.g. name) is value with a single write: INSERT ... ON
+        DUPLICATE KEY UPDATE on MySQL, elsewhere an UPDATE that falls back to an INSERT (and back to the UPDATE if a
+        concurrent writer inserted first). Only the posted fields are changed on update.
+
+        Args:
+            value: natural key of the record
+
+        Returns:
+            Tuple(str, int): JSON string and HTTP status code
+
+        """
+        payload = request.get_json()
+        if not isinstance(payload, dict):
+            return jsonify({"error": "No JSON data received",
+                            "data": None}), 422
+        values, errors = self.load_row(dict(payload, **{self.natural_key: value}),
+                                       self.schema_cls(exclude=tuple(self.references) + ("xid",)))
+        if errors:
+            return jsonify({"error": errors,
                             "data": None}), 422
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
-
-
-@app.route('/toilet/<int:xid>', methods=['PUT'])
-@accept('application/json')
-def route_toilet_put(xid: int) -> Tuple[str, int]:
-
-    if request.json:
-        toilet = db.session.query(models.Toilet).get(int(xid))
-        if toilet:
-            try:
-                toilet = schema.ToiletSchema().load(request.json,
-                                                  instance=toilet)
-                db.session.add(toilet)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
-
-        return return_result(schema.ToiletSchema().dump(toilet))
+        table = self.model.__table__
+        now = datetime.datetime.utcnow()
+        updates = dict({key: column for key, column in values.items() if key != self.natural_key}, date_modified=now)
+        inserts = dict(values, date_created=values.get("date_created") or now)
+        update = table.update().where(table.c[self.natural_key] == value).values(updates)
+        query = db.session.query(self.model).filter(getattr(self.model, self.natural_key) == value)
+        try:
+            if db.session.bind.dialect.name == "mysql":
+                db.session.execute(mysql_insert(table).values(inserts).on_duplicate_key_update(**updates))
+            elif not db.session.execute(update).rowcount:
+                db.session.execute(table.insert().values(inserts))
+        except IntegrityError as err:
+            db.session.rollback()
+            if not db.session.execute(update).rowcount:
+                return self.integrity_error(err, 409)
+        obj = query.populate_existing().one()
+        cache.touch(db.session, table.name)
+        events.record_object(db.session, "upserted", obj)
+        db.session.commit()
+        return return_result(self.dump_schema().dump(obj))
+
+    def _view(self, method: Callable, endpoint: str, doc: str) -> Callable:
+        """
+        Wraps a bound view method in a plain function so flasgger and flask_accept can annotate it per endpoint
+        """
+        def view(*args: Any, **kwargs: Any) -> Tuple[str, int]:
+            return method(*args, **kwargs)
+        view.__name__ = endpoint
+        if doc in self.docs:
+            # what flasgger.swag_from does with a dict, without importing flasgger at start up
+            view.specs_dict = self.docs[doc]
+        else:
+            view.__doc__ = method.__doc__
+        return view
+
+    def register(self) -> "Resource":
+        """
+        Adds the url rules for this resource to app and records it in resources
+
+        Returns:
+            Resource: self
+
+        """
+        name = self.name
+        # include_archive reads the archive table too
+        reads = (self.model, archive.ARCHIVES[self.model]) if self.model in archive.ARCHIVES else (self.model,)
+        rules = [("/{}/".format(name), "{}_get_all".format(name), "GET", cache.cached(*reads)(self.get), "get_all"),
+                 ("/{}/<int:xid>".format(name), "{}_get_xid".format(name), "GET", cache.cached(*reads)(self.get),
+                  "get_xid"),
+                 ("/{}/".format(name), "route_{}_post".format(name), "POST", accept('application/json')(self.post),
+                  "post"),
+                 ("/{}/<int:xid>".format(name), "route_{}_put".format(name), "PUT",
+                  accept('application/json')(self.put), "put"),
+                 ("/{}/<int:xid>".format(name), "route_{}_delete".format(name), "DELETE", self.delete, "delete")]
+        if self.natural_key:
+            rules.append(("/{}/by-{}/<value>".format(name, self.natural_key), "route_{}_upsert".format(name), "PUT",
+                          accept('application/json')(self.upsert), "upsert"))
+        if self.bulk:
+            rules.append(("/{}/_bulk".format(name), "route_{}_bulk_post".format(name), "POST",
+                          accept('application/json')(self.bulk_post), "bulk_post"))
+        for rule, endpoint, method, view, doc in rules:
+            app.add_url_rule(rule, endpoint, self._view(view, endpoint, doc), methods=[method])
+        resources[name] = self
+        return self
+
+
+resources: Dict[str, Resource] = dict()
+
+
+Resource("person", models.Person, schema.PersonSchema).register()
+Resource("pet", models.Pet, schema.PetSchema).register()
+Resource("food", models.Food, schema.FoodSchema, bulk=True, queued=True).register()
+Resource("water", models.Watercheck, schema.WatercheckSchema, label="Water", bulk=True, queued=True).register()
+Resource("activities", models.Activities, schema.ActivitiesSchema, bulk=True, queued=True).register()
+Resource("toilet", models.Toilet, schema.ToiletSchema, bulk=True, queued=True).register()
+Resource("thing", models.Thing, schema.ThingSchema,
+         docs={"get_all": documentation.thing_get_all,
+               "get_xid": documentation.thing_get_xid,
+               "post": documentation.thing_post,
+               "put": documentation.thing_put,
+               "delete": documentation.thing_delete}).register()
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
 
 ######################################################################################################
-######################################################################################################
+################################## PET ###############################################################
 ######################################################################################################
 
-@app.route('/thing/<int:xid>', methods=['DELETE'])
-@swag_from(documentation.thing_delete, methods=["DELETE"])
-def route_thing_delete(xid: int) -> Tuple[str, int]:
+@app.route('/pet/<int:xid>/daily', methods=['GET'], endpoint='pet_get_daily')
+@cache.cached(models.DailyPetStats)
+def route_pet_get_daily(xid: int) -> Tuple[str, int]:
     """
-    Attempts to delete the thing specified by xid
+    Per day feed, water check and toilet counts for a pet, read from the DailyPetStats rollup. "since" and "until"
+    restrict the days returned to [since, until).
 
     Args:
-        xid: integer identifier of thing to delete
+        xid: integer identifier of pet
 
     Returns:
         Tuple(str, int): JSON string and HTTP status code
 
     """
-    thing = db.session.query(models.Thing).get(int(xid))
-    if thing:
-        db.session.delete(thing)
-        db.session.commit()
-        return jsonify({"message": "Deleted Thing '{}'".format(thing.name),
-                        "data": None}), 200
-    else:
-        abort(404)
-
-
-@app.route('/thing/', methods=['GET'], endpoint='thing_get_all')
-@app.route('/thing/<int:xid>', methods=['GET'], endpoint='thing_get_xid')
-@swag_from(documentation.thing_get_xid, methods=["GET"], endpoint='thing_get_xid')
-@swag_from(documentation.thing_get_all, methods=["GET"], endpoint='thing_get_all')
-def route_thing_get(xid: Optional[Union[int, None]] = None) -> Tuple[str, int]:
+    filters = [models.DailyPetStats.pet_xid == xid]
+    try:
+        if request.args.get("since"):
+            filters.append(models.DailyPetStats.day >= parse_datetime(request.args["since"]).date())
+        if request.args.get("until"):
+            filters.append(models.DailyPetStats.day < parse_datetime(request.args["until"]).date())
+    except ValueError as e:
+        print(e)
+        abort(400)
+    return return_result(schema.DailyPetStatsSchema(many=True).dump(
+        db.session.query(models.DailyPetStats).filter(and_(*filters)).order_by(models.DailyPetStats.day).all()))
+
+
+@app.route('/pet/<int:xid>/summary', methods=['GET'], endpoint='pet_get_summary')
+@cache.cached(models.Pet, *archive.ARCHIVES.values())
+def route_pet_get_summary(xid: int) -> Tuple[str, int]:
     """
-    Attempts to retrieve thing specified by xid
+    Event totals for a pet computed with aggregate queries in the database: per event table the row count and first
+    and last date_created, toilet pee/poo/accident counts and accident ratio, and the mean interval between feeds.
+    "since" and "until" restrict the events considered, "include_archive=true" adds archived events.
 
     Args:
-        xid: integer identifier of thing
+        xid: integer identifier of pet
 
     Returns:
         Tuple(str, int): JSON string and HTTP status code
 
     """
-    if xid:
-        return return_result(schema.ThingSchema().dump(db.session.query(models.Thing).get(int(xid))))
-    else:
-        return return_result(schema.ThingSchema(many=True).dump(db.session.query(models.Thing).filter(and_(*format_search(models.Thing))).all()))
-
+    if not db.session.query(exists().where(models.Pet.xid == xid)).scalar():
+        abort(404)
 
-@app.route('/thing/', methods=['POST'])
-@swag_from(documentation.thing_post, methods=["POST"])
-@accept('application/json')
-def route_device_post() -> Tuple[str, int]:
-    """
-    Attempts to create a thing from posted JSON (if it exists)
+    def isoformat(value: Optional[datetime.datetime]) -> Optional[str]:
+        return value.replace(tzinfo=datetime.timezone.utc).isoformat() if value else None
+
+    summary = {"pet_xid": xid}
+    for name, model in (("food", models.Food), ("watercheck", models.Watercheck),
+                        ("activities", models.Activities), ("toilet", models.Toilet)):
+        rows = list()
+        for source in (model, archive.ARCHIVES[model]) if wants_archive() else (model,):
+            columns = [func.count(source.xid), func.min(source.date_created), func.max(source.date_created)]
+            if model is models.Toilet:
+                columns.extend(func.sum(case([(column, 1)], else_=0))
+                               for column in (source.pee, source.poo, source.accidnet))
+            rows.append(db.session.query(*columns).filter(source.pet_xid == xid, *format_search(source)).one())
+        row = [sum(row[0] for row in rows),
+               min((row[1] for row in rows if row[1] is not None), default=None),
+               max((row[2] for row in rows if row[2] is not None), default=None)] + \
+            [sum(int(row[index] or 0) for row in rows) for index in range(3, len(rows[0]))]
+        summary[name] = {"count": row[0], "first": isoformat(row[1]), "last": isoformat(row[2])}
+        if model is models.Food:
+            summary[name]["mean_interval_seconds"] = \
+                (row[2] - row[1]).total_seconds() / (row[0] - 1) if row[0] > 1 else None
+        if model is models.Toilet:
+            pees, poos, accidents = (int(value or 0) for value in row[3:])
+            summary[name].update({"pees": pees, "poos": poos, "accidents": accidents,
+                                  "accident_ratio": accidents / row[0] if row[0] else None})
+    return return_result(summary)
 
-    {
-        "name": <str>
-        "description": <str>
-    }
 
-    Returns:
-        Tuple(str, int): JSON string and HTTP status code
-
-    """
-    if request.get_json():
-        try:
-            thing = schema.ThingSchema().load(request.get_json())
-            db.session.add(thing)
-            db.session.commit()
-            return return_result(schema.ThingSchema().dump(thing))
-        except ValidationError as err:
-            return jsonify({"error": err.messages,
-                            "data": None}), 422
+######################################################################################################
+################################## EXPORT ############################################################
+######################################################################################################
 
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+""" export entity -> event model """
+EXPORTS = {"food": models.Food, "water": models.Watercheck, "activities": models.Activities, "toilet": models.Toilet}
 
 
-@app.route('/thing/<int:xid>', methods=['PUT'])
-@swag_from(documentation.thing_put, methods=["PUT"])
-@accept('application/json')
-def route_device_put(xid: int) -> Tuple[str, int]:
+@app.route('/export/<any({}):entity>.<any(csv, arrow, parquet):export_format>'.format(", ".join(EXPORTS)),
+           methods=['GET'], endpoint='export')
+def route_export(entity: str, export_format: str) -> Response:
     """
-    Attempts to update a thing from posted JSON (if it exists)
+    Streams the full history of an event table as CSV, or as Arrow IPC or Parquet when pyarrow is installed (404
+    otherwise), read from a server side cursor in EXPORT_BATCH_SIZE batches. Accepts the collection filters, e.g.
+    "pet_xid", "since" and "until", and "include_archive=true" to add archived rows.
 
     Args:
-        xid: integer identifier of thing
+        entity: one of EXPORTS
+        export_format: "csv", "arrow" or "parquet"
 
     Returns:
-        Tuple(str, int): JSON string and HTTP status code
+        Response: streamed file download
 
     """
-    if request.json:
-        thing = db.session.query(models.Thing).get(int(xid))
-        if thing:
-            try:
-                thing = schema.ThingSchema().load(request.json,
-                                                  instance=thing)
-                db.session.add(thing)
-                db.session.commit()
-            except ValidationError as err:
-                return jsonify({"error": err.messages,
-                                "data": None}), 409 if "name" in err.messages.keys() else 422
-
-        return return_result(schema.ThingSchema().dump(thing))
-
-    return jsonify({"error": "No JSON data received",
-                    "data": None}), 422
+    if export_format not in export.formats():
+        abort(404)
+    model = EXPORTS[entity]
+    sources = [(model, format_search(model))]
+    if wants_archive():
+        sources.append((archive.ARCHIVES[model], format_search(archive.ARCHIVES[model])))
+    response = Response(stream_with_context(export.export(sources, export_format)),
+                        mimetype=export.MIMETYPES[export_format])
+    response.headers["Content-Disposition"] = 'attachment; filename="{}.{}"'.format(entity, export_format)
+    return response
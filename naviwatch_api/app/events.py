@@ -0,0 +1,243 @@
+from app import app, cache, models
+from flask import json
+from sqlalchemy import event
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import Session
+from collections import deque
+from threading import Condition
+import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+"""
+In-process broadcast hub for the /events/stream Server-Sent Events feed. Session hooks capture every created, updated
+and deleted row during flush and publish them once the transaction commits, so subscribers never see rolled back
+writes. The last EVENT_BUFFER_SIZE events are kept in a ring buffer so reconnecting clients can resume from
+Last-Event-ID. Event ids are "<process epoch>-<sequence number>", so an id issued by another worker or before a restart
+is recognised and answered with a "reset" rather than compared with this process's counter.
+
+Like the response cache, the hub lives in process memory: a stream only carries writes committed by the process
+serving it.
+"""
+
+""" derived tables whose writes are not broadcast """
+UNPUBLISHED = {models.DailyPetStats.__tablename__}
+
+
+def format_id(number: int) -> str:
+    """
+    Args:
+        number: hub sequence number
+
+    Returns:
+        str: the event id sent to clients
+
+    """
+    return "{}-{}".format(cache.epoch(), number)
+
+
+def parse_id(value: str) -> Optional[int]:
+    """
+    Args:
+        value: an event id as sent back in Last-Event-ID
+
+    Returns:
+        int: the hub sequence number, or None if the id was issued by another process or run or is malformed
+
+    """
+    epoch, _, number = value.strip().rpartition("-")
+    if epoch != cache.epoch() or not number.isdigit():
+        return None
+    return int(number)
+
+
+class Event(object):
+    """
+    One committed change
+
+    Args:
+        kind: "created", "updated", "upserted" or "deleted"
+        table: table name
+        data: column values (None values omitted, datetimes in ISO 8601 UTC); rows written by _bulk inserts have no
+            xid, since multi-row inserts don't return generated keys
+        pet_xid: pet the row belongs to (the row itself for Pet), if any
+
+    """
+
+    def __init__(self, kind: str, table: str, data: Dict[str, Any], pet_xid: Optional[int] = None) -> None:
+        self.id = 0
+        self.kind = kind
+        self.table = table
+        self.data = data
+        self.pet_xid = pet_xid
+
+    def format(self) -> str:
+        """
+        Returns:
+            str: the event as a text/event-stream message
+
+        """
+        return "id: {}\nevent: {}\ndata: {}\n\n".format(format_id(self.id), self.kind,
+                                                        json.dumps({"table": self.table, "data": self.data}))
+
+
+class Hub(object):
+    """
+    Thread safe publisher with a bounded replay buffer
+
+    Args:
+        size: number of events kept for Last-Event-ID resume
+
+    """
+
+    def __init__(self, size: int) -> None:
+        self.last_id = 0
+        self._buffer: deque = deque(maxlen=size)
+        self._condition = Condition()
+
+    def publish(self, events: List[Event]) -> None:
+        with self._condition:
+            for item in events:
+                self.last_id += 1
+                item.id = self.last_id
+                self._buffer.append(item)
+            self._condition.notify_all()
+
+    def oldest_id(self) -> int:
+        """
+        Returns:
+            int: id of the oldest buffered event, last_id + 1 if the buffer is empty
+
+        """
+        with self._condition:
+            return self._buffer[0].id if self._buffer else self.last_id + 1
+
+    def wait(self, after: int, timeout: float) -> List[Event]:
+        """
+        Blocks until events newer than after are available or timeout expires
+
+        Args:
+            after: id of the last event the caller has seen
+            timeout: seconds to wait
+
+        Returns:
+            list: buffered events with id > after, oldest first (empty on timeout)
+
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_id > after, timeout)
+            return [item for item in self._buffer if item.id > after]
+
+
+hub = Hub(app.config.get("EVENT_BUFFER_SIZE", 1000))
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=datetime.timezone.utc).isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def record(session: Session, kind: str, table: str, data: Dict[str, Any], pet_xid: Optional[int] = None) -> None:
+    """
+    Queues an event to be published when the session's current transaction commits. ORM flushes are recorded
+    automatically; core statements executed through the session (bulk inserts, upserts) must call this.
+
+    Args:
+        session: Sqlalchemy session
+        kind: "created", "updated", "upserted" or "deleted"
+        table: table name
+        data: column values
+        pet_xid: pet the change belongs to, if any
+
+    Returns:
+        None
+
+    """
+    if table in UNPUBLISHED:
+        return
+    data = {key: _value(value) for key, value in data.items() if value is not None}
+    session.info.setdefault("pending_events", list()).append(Event(kind, table, data, pet_xid))
+
+
+def record_object(session: Session, kind: str, obj: models.Base) -> None:
+    """
+    Queues an event carrying the current column values of an ORM instance (see record)
+
+    Args:
+        session: Sqlalchemy session
+        kind: "created", "updated", "upserted" or "deleted"
+        obj: model instance
+
+    Returns:
+        None
+
+    """
+    table = inspect(obj).mapper.local_table
+    data = {column.key: getattr(obj, column.key) for column in table.columns}
+    record(session, kind, table.name, data, obj.xid if isinstance(obj, models.Pet) else data.get("pet_xid"))
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    for kind, objs in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objs:
+            if kind != "updated" or session.is_modified(obj):
+                record_object(session, kind, obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop("pending_events", None)
+    if pending:
+        hub.publish(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("pending_events", None)
+
+
+def stream(last_event_id: Optional[str], pet_xid: Optional[int] = None,
+           table: Optional[str] = None) -> Iterator[str]:
+    """
+    Generates text/event-stream messages for events after last_event_id (or from now if None), optionally only those of
+    one pet and/or table. Sends a comment every EVENT_HEARTBEAT_SECONDS to keep idle connections open, and a "reset"
+    event so the client knows to refetch if last_event_id has already been evicted from the buffer, or was not issued
+    by this process (another worker, or before a restart), in which case the stream starts from now.
+
+    Args:
+        last_event_id: Last-Event-ID sent by a reconnecting client
+        pet_xid: only send events for this pet
+        table: only send events for this table
+
+    Returns:
+        Iterator[str]: event stream messages
+
+    """
+    heartbeat = app.config.get("EVENT_HEARTBEAT_SECONDS", 15)
+    reset = "event: reset\ndata: {}\n\n".format(json.dumps({"oldest": format_id(hub.oldest_id())}))
+    last_id = None if last_event_id is None else parse_id(last_event_id)
+    if last_event_id is None:
+        last_id = hub.last_id
+    elif last_id is None or last_id > hub.last_id:
+        # issued by another process or run, there is nothing to resume from
+        last_id = hub.last_id
+        yield reset
+    elif last_id + 1 < hub.oldest_id():
+        yield reset
+    yield "retry: {}\n\n".format(app.config.get("EVENT_RETRY_MILLISECONDS", 3000))
+    while True:
+        events = hub.wait(last_id, heartbeat)
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for item in events:
+            last_id = item.id
+            if pet_xid is not None and item.pet_xid != pet_xid:
+                continue
+            if table is not None and item.table.lower() != table.lower():
+                continue
+            yield item.format()
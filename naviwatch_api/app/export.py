@@ -0,0 +1,162 @@
+"""
+Bulk export of the event tables as CSV, or as an Arrow IPC stream or Parquet file when pyarrow is installed. Rows are
+read through a server side cursor (stream_results) on a connection of its own and fetched EXPORT_BATCH_SIZE at a time;
+each batch is encoded and sent before the next is fetched, so memory is bounded by one batch whatever the size of the
+export. Columns are the table's columns in table order, with datetimes in UTC (written with an explicit +00:00 offset
+in CSV, as timestamp(tz="UTC") columns in Arrow and Parquet).
+"""
+
+from app import app, db
+from sqlalchemy import Boolean, Date, DateTime, Integer, Table, and_, select, union_all
+import csv
+import datetime
+import io
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Type
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+""" format -> mimetype """
+MIMETYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def formats() -> List[str]:
+    """
+    Returns:
+        list: export formats available in this process
+
+    """
+    return [name for name in MIMETYPES if name == "csv" or pyarrow is not None]
+
+
+def _batches(sources: Sequence[Tuple[Table, List[Any]]], batch_size: int) -> Iterator[List[Any]]:
+    """ Yields lists of up to batch_size rows of the union of the (table, filters) sources, in xid order """
+    columns = [column.key for column in sources[0][0].columns]
+    selects = [select([table.c[column] for column in columns]).where(and_(*filters)) for table, filters in sources]
+    statement = selects[0].order_by(sources[0][0].c.xid) if len(selects) == 1 else \
+        union_all(*selects).order_by("xid")
+    connection = db.engine.connect().execution_options(stream_results=True)
+    try:
+        result = connection.execute(statement)
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        connection.close()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return (value.replace(tzinfo=datetime.timezone.utc) if value.tzinfo is None else value).isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _csv(columns: List[str], batches: Iterator[List[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    try:
+        for rows in batches:
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        batches.close()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _Sink(object):
+    """ Write only file object that hands what pyarrow writes to the response generator """
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = list()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = list()
+        return data
+
+
+def _arrow_type(column: Any) -> Any:
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp("us", tz="UTC")
+    if isinstance(column.type, Date):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+def _arrow(table: Table, batches: Iterator[List[Any]], parquet: bool) -> Iterator[bytes]:
+    schema = pyarrow.schema([pyarrow.field(column.key, _arrow_type(column), nullable=column.nullable)
+                             for column in table.columns])
+    sink = _Sink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema) if parquet else pyarrow.ipc.new_stream(sink, schema)
+    try:
+        for rows in batches:
+            arrays = [pyarrow.array([row[index] for row in rows], type=field.type)
+                      for index, field in enumerate(schema)]
+            batch = pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+            if parquet:
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        batches.close()
+    writer.close()
+    yield sink.drain()
+
+
+def export(sources: Sequence[Tuple[Type[db.Model], List[Any]]], export_format: str,
+           batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Streams the rows of one or more models (e.g. an event model and its archive model) in export_format
+
+    Args:
+        sources: (<Sqlalchemy model>, filter terms) pairs; the first model's columns are exported
+        export_format: one of formats()
+        batch_size: rows per fetch and per encoded chunk, defaults to EXPORT_BATCH_SIZE
+
+    Returns:
+        Iterator[bytes]: the encoded export, one chunk per batch
+
+    """
+    table = sources[0][0].__table__
+    batches = _batches([(model.__table__, filters) for model, filters in sources],
+                       batch_size or app.config.get("EXPORT_BATCH_SIZE", 10000))
+    if export_format == "csv":
+        return _csv([column.key for column in table.columns], batches)
+    return _arrow(table, batches, export_format == "parquet")
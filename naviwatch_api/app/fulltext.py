@@ -0,0 +1,116 @@
+from app import db, models
+from flask import abort
+from sqlalchemy import DDL, event, literal_column, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import column, table
+import re
+from typing import Any, Dict, List, Type
+
+
+"""
+Full-text search on event comments. MySQL uses a FULLTEXT index and MATCH ... AGAINST; SQLite uses an external content
+FTS5 table "<Table>_fts" kept in sync with the base table by triggers. Both are created by the migration for existing
+databases and by the after_create hooks below for tables made with db.create_all(). Other databases, or SQLite builds
+without FTS5, fall back to unranked LIKE matching.
+"""
+
+""" model -> searchable column """
+SEARCHABLE = {
+    models.Watercheck: "comment",
+    models.Activities: "comment",
+}
+
+SQLITE_STATEMENTS = [
+    'CREATE VIRTUAL TABLE "{fts}" USING fts5({column}, content=\'{table}\', content_rowid=\'xid\')',
+    'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+    'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); END',
+    'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+    'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+]
+
+MYSQL_STATEMENTS = [
+    'ALTER TABLE `{table}` ADD FULLTEXT INDEX `ix_{table}_{column}_fulltext` ({column})',
+]
+
+_fts5: Dict[Any, bool] = dict()
+
+
+def _sqlite_has_fts5(ddl: Any, target: Any, bind: Any, **kwargs: Any) -> bool:
+    """ execute_if callable: True if the SQLite library was compiled with FTS5 """
+    return bind.dialect.name == "sqlite" and \
+        any(option == "ENABLE_FTS5" for option, in bind.execute("PRAGMA compile_options"))
+
+
+def _listen_create() -> None:
+    """ Emits the full-text DDL whenever a searchable table is created with metadata.create_all() """
+    for model, searchable in SEARCHABLE.items():
+        names = dict(table=model.__tablename__, fts=model.__tablename__ + "_fts", column=searchable)
+        for statement in SQLITE_STATEMENTS:
+            event.listen(model.__table__, "after_create",
+                         DDL(statement.format(**names)).execute_if(callable_=_sqlite_has_fts5))
+        for statement in MYSQL_STATEMENTS:
+            event.listen(model.__table__, "after_create",
+                         DDL(statement.format(**names)).execute_if(dialect="mysql"))
+
+
+_listen_create()
+
+
+def _has_fts_table(model: Type[models.Base]) -> bool:
+    """ True if the FTS5 shadow table for model exists, checked once per engine """
+    key = (db.engine.url, model)
+    if key not in _fts5:
+        _fts5[key] = model.__tablename__ + "_fts" in db.engine.table_names()
+    return _fts5[key]
+
+
+def terms(q: str) -> List[str]:
+    """
+    Splits a search string into plain word terms so user input can never inject full-text query operators
+
+    Args:
+        q: search string
+
+    Returns:
+        list: words
+
+    """
+    return re.findall(r"\w+", q)
+
+
+def search(query: Query, model: Type[models.Base], q: str) -> Query:
+    """
+    Restricts query to rows whose searchable column matches any word of q, ordered by relevance (best first). Aborts
+    with 400 if model has no searchable column or q contains no words.
+
+    Args:
+        query: <Sqlalchemy query> on model
+        model: <Sqlalchemy model>
+        q: search string
+
+    Returns:
+        Query: filtered and ordered query
+
+    """
+    words = terms(q)
+    if model not in SEARCHABLE or not words:
+        abort(400)
+    searchable = getattr(model, SEARCHABLE[model])
+    dialect = db.engine.dialect.name
+
+    if dialect == "mysql":
+        match = searchable.match(" ".join(words))
+        return query.filter(match).order_by(match.desc())
+
+    if dialect == "sqlite" and _has_fts_table(model):
+        fts = table(model.__tablename__ + "_fts", column("rowid"), column("rank"))
+        match = " OR ".join('"{}"'.format(word) for word in words)
+        return query.join(fts, fts.c.rowid == model.xid) \
+            .filter(literal_column('"{}"'.format(fts.name)).op("MATCH")(match)) \
+            .order_by(fts.c.rank)
+
+    return query.filter(or_(*[searchable.like("%{}%".format(word)) for word in words]))
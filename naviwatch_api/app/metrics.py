@@ -0,0 +1,150 @@
+from app import app
+from flask import g, request, Response
+from bisect import bisect_left
+from threading import Lock, local
+import time
+from typing import Any, Dict, List, Tuple
+
+
+"""
+Prometheus metrics for /metrics: a request latency histogram and a request counter per endpoint, method and status,
+plus an in-flight gauge per endpoint. A request counts as in flight until its response is closed by the server, so
+streamed responses (NDJSON, SSE) stay in the gauge while their body is being sent; latency is measured up to the
+response object being built. Each thread records into its own shard, so serving a request takes no lock; the
+shards are only summed when /metrics is scraped. Values are per process, so with several gunicorn workers each scrape
+sees the worker that answered it.
+"""
+
+BUCKETS = tuple(app.config.get("METRICS_BUCKETS", (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)))
+
+Key = Tuple[str, str]
+
+
+class Shard(object):
+    """
+    One thread's metrics: per (endpoint, method) bucket counts (non cumulative, last slot is +Inf) and latency sum,
+    per (endpoint, method, status) request counts, and per (endpoint, method) requests in flight
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[Key, List[int]] = dict()
+        self.sums: Dict[Key, float] = dict()
+        self.requests: Dict[Tuple[str, str, int], int] = dict()
+        self.in_flight: Dict[Key, int] = dict()
+
+
+_shards: List[Shard] = list()
+_shards_lock = Lock()
+_local = local()
+
+
+def _shard() -> Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def _key() -> Key:
+    return request.endpoint or "unmatched", request.method
+
+
+@app.before_request
+def _start() -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    g.metrics_started = time.perf_counter()
+    key = _key()
+    shard = _shard()
+    shard.in_flight[key] = shard.in_flight.get(key, 0) + 1
+
+
+@app.after_request
+def _observe(response: Response) -> Response:
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint, method = key = _key()
+    shard = _shard()
+    counts = shard.buckets.get(key)
+    if counts is None:
+        counts = shard.buckets[key] = [0] * (len(BUCKETS) + 1)
+    counts[bisect_left(BUCKETS, seconds)] += 1
+    shard.sums[key] = shard.sums.get(key, 0.0) + seconds
+    status = (endpoint, method, response.status_code)
+    shard.requests[status] = shard.requests.get(status, 0) + 1
+    response.call_on_close(lambda: _leave(key))
+    return response
+
+
+@app.teardown_request
+def _finish(exception: Any = None) -> None:
+    # after_request did not run (the exception propagated), so there is no response to wait for
+    if g.pop("metrics_started", None) is not None:
+        _leave(_key())
+
+
+def _leave(key: Key) -> None:
+    # decrements the closing thread's shard, which need not be the one that counted the request in; only the sum over
+    # shards is reported
+    shard = _shard()
+    shard.in_flight[key] = shard.in_flight.get(key, 0) - 1
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                    for name, value in labels.items())
+
+
+def render() -> str:
+    """
+    Returns:
+        str: all metrics in the Prometheus text exposition format (version 0.0.4)
+
+    """
+    buckets: Dict[Key, List[int]] = dict()
+    sums: Dict[Key, float] = dict()
+    requests: Dict[Tuple[str, str, int], int] = dict()
+    in_flight: Dict[Key, int] = dict()
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, counts in list(shard.buckets.items()):
+            total = buckets.setdefault(key, [0] * (len(BUCKETS) + 1))
+            for index, count in enumerate(counts):
+                total[index] += count
+        for key, value in list(shard.sums.items()):
+            sums[key] = sums.get(key, 0.0) + value
+        for key, value in list(shard.requests.items()):
+            requests[key] = requests.get(key, 0) + value
+        for key, value in list(shard.in_flight.items()):
+            in_flight[key] = in_flight.get(key, 0) + value
+
+    lines = ["# HELP naviwatch_http_request_duration_seconds Time spent handling requests.",
+             "# TYPE naviwatch_http_request_duration_seconds histogram"]
+    for (endpoint, method), counts in sorted(buckets.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += count
+            lines.append("naviwatch_http_request_duration_seconds_bucket{{{}}} {}".format(
+                _labels(endpoint=endpoint, method=method, le=bound), cumulative))
+        lines.append("naviwatch_http_request_duration_seconds_sum{{{}}} {}".format(
+            _labels(endpoint=endpoint, method=method), sums.get((endpoint, method), 0.0)))
+        lines.append("naviwatch_http_request_duration_seconds_count{{{}}} {}".format(
+            _labels(endpoint=endpoint, method=method), cumulative))
+
+    lines += ["# HELP naviwatch_http_requests_total Requests handled, by response status.",
+              "# TYPE naviwatch_http_requests_total counter"]
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append("naviwatch_http_requests_total{{{}}} {}".format(
+            _labels(endpoint=endpoint, method=method, status=status), count))
+
+    lines += ["# HELP naviwatch_http_requests_in_flight Requests currently being handled.",
+              "# TYPE naviwatch_http_requests_in_flight gauge"]
+    for (endpoint, method), count in sorted(in_flight.items()):
+        lines.append("naviwatch_http_requests_in_flight{{{}}} {}".format(
+            _labels(endpoint=endpoint, method=method), count))
+    return "\n".join(lines) + "\n"
@@ -11,7 +11,9 @@ from alembic import context
 import sys
 from os.path import abspath, dirname
 sys.path.insert(0, dirname(dirname(dirname(abspath(__file__))))) # Insert <.>/src
-from app import app, models
+from app import create_app
+app = create_app()
+from app import models
 target_metadata = models.Base.metadata
 
 # this is the Alembic Config object, which provides
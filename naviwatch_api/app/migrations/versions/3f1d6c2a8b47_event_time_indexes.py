@@ -0,0 +1,44 @@
+"""composite (pet_xid, date_created) indexes on event tables
+
+Revision ID: 3f1d6c2a8b47
+Revises: 9c37c254a0e9
+Create Date: 2026-10-17 09:12:44.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1d6c2a8b47'
+down_revision = '9c37c254a0e9'
+branch_labels = None
+depends_on = None
+
+
+EVENT_TABLES = ['Food', 'Watercheck', 'Activities', 'Toilet']
+
+
+def _existing_indexes():
+    """
+    Returns {table name: set of index names} for the event tables present in the database. Tables that are missing
+    are skipped; they get the index from the model metadata when they are created.
+    """
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    return {table: {index['name'] for index in inspector.get_indexes(table)}
+            for table in EVENT_TABLES if table in tables}
+
+
+def upgrade():
+    for table, indexes in _existing_indexes().items():
+        name = 'ix_{}_pet_xid_date_created'.format(table)
+        if name not in indexes:
+            op.create_index(name, table, ['pet_xid', 'date_created'], unique=False)
+
+
+def downgrade():
+    for table, indexes in _existing_indexes().items():
+        name = 'ix_{}_pet_xid_date_created'.format(table)
+        if name in indexes:
+            op.drop_index(name, table_name=table)
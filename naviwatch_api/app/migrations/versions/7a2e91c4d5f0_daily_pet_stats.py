@@ -0,0 +1,44 @@
+"""DailyPetStats rollup table
+
+Revision ID: 7a2e91c4d5f0
+Revises: 3f1d6c2a8b47
+Create Date: 2026-10-17 11:02:17.480551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2e91c4d5f0'
+down_revision = '3f1d6c2a8b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'DailyPetStats' in tables or 'Pet' not in tables:
+        # without Pet (no migration creates it) DailyPetStats is created from the model metadata along with Pet
+        return
+    op.create_table('DailyPetStats',
+    sa.Column('xid', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('date_modified', sa.DateTime(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('feeds', sa.Integer(), nullable=False),
+    sa.Column('waterchecks', sa.Integer(), nullable=False),
+    sa.Column('pees', sa.Integer(), nullable=False),
+    sa.Column('poos', sa.Integer(), nullable=False),
+    sa.Column('accidents', sa.Integer(), nullable=False),
+    sa.Column('pet_xid', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['pet_xid'], ['Pet.xid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('xid'),
+    sa.UniqueConstraint('pet_xid', 'day', name='uq_DailyPetStats_pet_xid_day')
+    )
+
+
+def downgrade():
+    if 'DailyPetStats' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('DailyPetStats')
@@ -0,0 +1,69 @@
+"""full-text search on Watercheck.comment and Activities.comment
+
+Revision ID: b4c8e1f26a93
+Revises: 7a2e91c4d5f0
+Create Date: 2026-10-17 14:26:51.918023
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c8e1f26a93'
+down_revision = '7a2e91c4d5f0'
+branch_labels = None
+depends_on = None
+
+
+SEARCHABLE = [('Watercheck', 'comment'), ('Activities', 'comment')]
+
+SQLITE_UPGRADE = [
+    'CREATE VIRTUAL TABLE "{fts}" USING fts5({column}, content=\'{table}\', content_rowid=\'xid\')',
+    'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+    'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); END',
+    'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+    'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+]
+
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS "{fts}_ai"',
+    'DROP TRIGGER IF EXISTS "{fts}_ad"',
+    'DROP TRIGGER IF EXISTS "{fts}_au"',
+    'DROP TABLE IF EXISTS "{fts}"',
+]
+
+
+def _searchable_tables():
+    """
+    Yields (table, column, existing table names) for the searchable tables present in the database; missing tables get
+    their full-text index from the app.fulltext create hooks when they are created.
+    """
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for table, column in SEARCHABLE:
+        if table in tables:
+            yield table, column, tables
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, column, tables in _searchable_tables():
+        if dialect == 'mysql':
+            op.create_index('ix_{}_{}_fulltext'.format(table, column), table, [column], mysql_prefix='FULLTEXT')
+        elif dialect == 'sqlite' and table + '_fts' not in tables:
+            for statement in SQLITE_UPGRADE:
+                op.execute(statement.format(table=table, fts=table + '_fts', column=column))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table, column, tables in _searchable_tables():
+        if dialect == 'mysql':
+            op.drop_index('ix_{}_{}_fulltext'.format(table, column), table_name=table)
+        elif dialect == 'sqlite':
+            for statement in SQLITE_DOWNGRADE:
+                op.execute(statement.format(table=table, fts=table + '_fts', column=column))
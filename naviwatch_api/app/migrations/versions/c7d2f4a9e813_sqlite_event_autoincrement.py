@@ -0,0 +1,71 @@
+"""AUTOINCREMENT on the SQLite event tables
+
+Revision ID: c7d2f4a9e813
+Revises: e5a90d3c71b2
+Create Date: 2026-10-18 10:14:37.652093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2f4a9e813'
+down_revision = 'e5a90d3c71b2'
+branch_labels = None
+depends_on = None
+
+
+EVENT_TABLES = ['Food', 'Watercheck', 'Activities', 'Toilet']
+
+""" full-text triggers (see b4c8e1f26a93), dropped by SQLite along with the table they are on """
+SEARCHABLE = {'Watercheck': 'comment', 'Activities': 'comment'}
+
+SQLITE_TRIGGERS = [
+    'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+    'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); END',
+    'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{table}" BEGIN '
+    'INSERT INTO "{fts}"("{fts}", rowid, {column}) VALUES (\'delete\', old.xid, old.{column}); '
+    'INSERT INTO "{fts}"(rowid, {column}) VALUES (new.xid, new.{column}); END',
+]
+
+
+def _rebuild(autoincrement):
+    """
+    Recreates the SQLite event tables that don't match autoincrement, keeping their rows, indexes and full-text
+    triggers. Other databases already never reuse xids (InnoDB 8.0 persists its counter) and are left alone.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    tables = sa.inspect(bind).get_table_names()
+    for table in EVENT_TABLES:
+        if table not in tables:
+            continue
+        sql = bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table"),
+                           table=table).scalar()
+        if ('AUTOINCREMENT' in sql.upper()) == autoincrement:
+            continue
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+        if table in SEARCHABLE and table + '_fts' in tables:
+            for statement in SQLITE_TRIGGERS:
+                op.execute(statement.format(table=table, fts=table + '_fts', column=SEARCHABLE[table]))
+        if autoincrement:
+            # continue after the largest xid ever issued, including rows already moved to the archive
+            archive = table + 'Archive'
+            largest = max(bind.execute(sa.text('SELECT MAX(xid) FROM "{}"'.format(name))).scalar() or 0
+                          for name in (table, archive) if name in tables)
+            bind.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :table'), table=table)
+            bind.execute(sa.text('INSERT INTO sqlite_sequence (name, seq) VALUES (:table, :seq)'),
+                         table=table, seq=largest)
+
+
+def upgrade():
+    _rebuild(True)
+
+
+def downgrade():
+    _rebuild(False)
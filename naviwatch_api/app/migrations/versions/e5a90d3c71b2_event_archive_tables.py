@@ -0,0 +1,66 @@
+"""archive tables for the event tables
+
+Revision ID: e5a90d3c71b2
+Revises: b4c8e1f26a93
+Create Date: 2026-10-17 20:41:09.331857
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a90d3c71b2'
+down_revision = 'b4c8e1f26a93'
+branch_labels = None
+depends_on = None
+
+
+""" archive table -> event specific columns """
+ARCHIVE_TABLES = {
+    'FoodArchive': [sa.Column('foodtype', sa.String(length=255), nullable=True),
+                    sa.Column('pet_xid', sa.Integer(), nullable=True),
+                    sa.Column('person_xid', sa.Integer(), nullable=True)],
+    'WatercheckArchive': [sa.Column('act_type', sa.String(length=255), nullable=True),
+                          sa.Column('comment', sa.String(length=255), nullable=True),
+                          sa.Column('pet_xid', sa.Integer(), nullable=True),
+                          sa.Column('person_xid', sa.Integer(), nullable=True)],
+    'ActivitiesArchive': [sa.Column('act_type', sa.String(length=255), nullable=True),
+                          sa.Column('comment', sa.String(length=255), nullable=True),
+                          sa.Column('pet_xid', sa.Integer(), nullable=True),
+                          sa.Column('Person_xid', sa.Integer(), nullable=True)],
+    'ToiletArchive': [sa.Column('pee', sa.Boolean(), nullable=True),
+                      sa.Column('poo', sa.Boolean(), nullable=True),
+                      sa.Column('accidnet', sa.Boolean(), nullable=True),
+                      sa.Column('pet_xid', sa.Integer(), nullable=True),
+                      sa.Column('person_xid', sa.Integer(), nullable=True)],
+}
+
+""" MySQL: compressed pages, one partition per year (split off pmax by "flask archive") """
+MYSQL_OPTIONS = {'mysql_row_format': 'COMPRESSED',
+                 'mysql_partition_by': 'RANGE (YEAR(date_created)) (PARTITION pmax VALUES LESS THAN MAXVALUE)'}
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for table, columns in ARCHIVE_TABLES.items():
+        if table in tables:
+            continue
+        op.create_table(table,
+        sa.Column('xid', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('date_created', sa.DateTime(), nullable=False),
+        sa.Column('date_modified', sa.DateTime(), nullable=True),
+        sa.Column('updated_by', sa.Integer(), nullable=True),
+        *columns,
+        sa.PrimaryKeyConstraint('xid', 'date_created', name='pk_{}'.format(table)),
+        **MYSQL_OPTIONS
+        )
+        op.create_index('ix_{}_pet_xid_date_created'.format(table), table, ['pet_xid', 'date_created'], unique=False)
+
+
+def downgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for table in ARCHIVE_TABLES:
+        if table in tables:
+            op.drop_index('ix_{}_pet_xid_date_created'.format(table), table_name=table)
+            op.drop_table(table)
@@ -1,6 +1,6 @@
 from app import db
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declared_attr
 
@@ -58,10 +58,11 @@ class Pet(Base):
     birthday = Column(String(255), nullable=True)
 
     """ Relationships """
-    Food = relationship('Food')
+    food = relationship('Food')
     watercheck = relationship('Watercheck')
     activities = relationship('Activities')
     toilet = relationship('Toilet')
+    daily_stats = relationship('DailyPetStats', cascade='all, delete-orphan', passive_deletes=True)
 
 
 class Food(Base):
@@ -78,6 +79,11 @@ class Food(Base):
     pet = relationship('Pet')
     person = relationship('Person')
 
+    """ Indexes """
+    # AUTOINCREMENT on the event tables so SQLite never hands out the xid of a row moved to the archive (app.archive)
+    __table_args__ = (Index('ix_Food_pet_xid_date_created', 'pet_xid', 'date_created'),
+                      {'sqlite_autoincrement': True})
+
 
 class Watercheck(Base):
     """ Thing SQL Alchemy Model """
@@ -94,6 +100,10 @@ class Watercheck(Base):
     pet = relationship('Pet')
     person = relationship('Person')
 
+    """ Indexes """
+    __table_args__ = (Index('ix_Watercheck_pet_xid_date_created', 'pet_xid', 'date_created'),
+                      {'sqlite_autoincrement': True})
+
 
 class Activities(Base):
     """ Thing SQL Alchemy Model """
@@ -110,6 +120,10 @@ class Activities(Base):
     pet = relationship('Pet')
     person = relationship('Person')
 
+    """ Indexes """
+    __table_args__ = (Index('ix_Activities_pet_xid_date_created', 'pet_xid', 'date_created'),
+                      {'sqlite_autoincrement': True})
+
 
 class Toilet(Base):
     """ Thing SQL Alchemy Model """
@@ -127,6 +141,31 @@ class Toilet(Base):
     pet = relationship('Pet')
     person = relationship('Person')
 
+    """ Indexes """
+    __table_args__ = (Index('ix_Toilet_pet_xid_date_created', 'pet_xid', 'date_created'),
+                      {'sqlite_autoincrement': True})
+
+
+class DailyPetStats(Base):
+    """ Per pet, per day (UTC) event count rollup, maintained by app.rollup """
+
+    """ Data Columns """
+    day = Column(Date, nullable=False)
+    feeds = Column(Integer, nullable=False, default=0)
+    waterchecks = Column(Integer, nullable=False, default=0)
+    pees = Column(Integer, nullable=False, default=0)
+    poos = Column(Integer, nullable=False, default=0)
+    accidents = Column(Integer, nullable=False, default=0)
+
+    """ Foreign Keys """
+    pet_xid = Column(Integer, ForeignKey('Pet.xid', ondelete='CASCADE'), nullable=False)
+
+    """ Relationships """
+    pet = relationship('Pet')
+
+    """ Indexes """
+    __table_args__ = (UniqueConstraint('pet_xid', 'day', name='uq_DailyPetStats_pet_xid_day'),)
+
 
 ##################################################################################
 
@@ -0,0 +1,118 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import Pool
+from threading import Lock
+import time
+from typing import Any, Callable, Dict
+
+
+"""
+Connection pool telemetry for /_internal/pool. Pool events count new DBAPI connections, checkouts, checkins and
+invalidations (a connection found dead by pool_pre_ping, or discarded after an error, is invalidated and replaced, so
+invalidations are the reconnect count). The time callers spend waiting for a connection is measured around
+the pool's connect(), which includes waiting for a free slot and opening new connections. Counters are per process.
+"""
+
+_counters = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0, "soft_invalidations": 0,
+             "timeouts": 0, "acquires": 0}
+_wait = {"total": 0.0, "max": 0.0}
+_lock = Lock()
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _counters[name] += 1
+
+
+@event.listens_for(Pool, "connect")
+def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+    _count("connects")
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+    _count("checkouts")
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+    _count("checkins")
+
+
+@event.listens_for(Pool, "invalidate")
+def _on_invalidate(dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+    _count("invalidations")
+
+
+@event.listens_for(Pool, "soft_invalidate")
+def _on_soft_invalidate(dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+    _count("soft_invalidations")
+
+
+def _timed(checkout: Callable[[], Any]) -> Callable[[], Any]:
+    def timed_checkout() -> Any:
+        started = time.monotonic()
+        try:
+            return checkout()
+        except PoolTimeout:
+            _count("timeouts")
+            raise
+        finally:
+            waited = time.monotonic() - started
+            with _lock:
+                _counters["acquires"] += 1
+                _wait["total"] += waited
+                _wait["max"] = max(_wait["max"], waited)
+    return timed_checkout
+
+
+def instrument(engine: Engine) -> Engine:
+    """
+    Times every connection checkout from engine's pool, whether made by a session or engine.connect(). Forked workers
+    keep the pool (connections opened by another process are replaced on checkout, see _check_pid in app/__init__.py),
+    so one call covers them all; engine.dispose() creates a new pool, which must be instrumented again.
+
+    Args:
+        engine: Sqlalchemy engine
+
+    Returns:
+        Engine: engine
+
+    """
+    pool = engine.pool
+    if getattr(pool, "_naviwatch_timed", False):
+        return engine
+    # sessions check out through connect(), engine.connect() and raw_connection() through unique_connection()
+    pool.connect = _timed(pool.connect)
+    pool.unique_connection = _timed(pool.unique_connection)
+    pool._naviwatch_timed = True
+    return engine
+
+
+def stats(engine: Engine) -> Dict[str, Any]:
+    """
+    Args:
+        engine: Sqlalchemy engine
+
+    Returns:
+        dict: pool class and sizing, current checked out and overflow connections (QueuePool only), event counters and
+        connection wait times in milliseconds
+
+    """
+    pool = engine.pool
+    current = {"pool": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            current[name] = getattr(pool, name)()
+    if hasattr(pool, "_max_overflow"):
+        current["max_overflow"] = pool._max_overflow
+    current["recycle"] = pool._recycle
+    current["pre_ping"] = pool._pre_ping
+    with _lock:
+        current.update(_counters)
+        current["wait_ms_total"] = round(_wait["total"] * 1000, 3)
+        current["wait_ms_max"] = round(_wait["max"] * 1000, 3)
+        current["wait_ms_mean"] = \
+            round(_wait["total"] * 1000 / _counters["acquires"], 3) if _counters["acquires"] else 0
+    return current
@@ -0,0 +1,63 @@
+from app import app
+from flask import g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+import time
+from typing import Any
+
+
+"""
+Per request SQL instrumentation from cursor execute events. Every buffered response gets a Server-Timing "db" entry with
+the number of statements the request ran and the time spent in them, statements slower than SQL_SLOW_QUERY_MS are
+logged, and a statement run more than SQL_REPEATED_STATEMENT_THRESHOLD times in one request is logged as a likely N+1
+query.
+Statements are compared by their SQL text, which has bound parameters as placeholders, so repeated lookups with
+different values share a shape.
+
+Streamed responses (NDJSON, streamed arrays, exports, event streams) get no Server-Timing header: headers are sent
+before the body is generated, and most of their statements run while it is, so any count would be wrong.
+
+Statements run outside a request (CLI commands, the write queue) are only checked for slowness.
+"""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                           executemany: bool) -> None:
+    conn.info.setdefault("query_started", list()).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                          executemany: bool) -> None:
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    if not app.config.get("SQL_TIMING_ENABLED", True):
+        return
+    if seconds * 1000 >= app.config.get("SQL_SLOW_QUERY_MS", 200):
+        app.logger.warning("Slow query (%.1f ms%s): %s", seconds * 1000,
+                           " in {}".format(request.endpoint) if has_request_context() else "", statement)
+    if has_request_context():
+        g.sql_count = g.get("sql_count", 0) + 1
+        g.sql_seconds = g.get("sql_seconds", 0.0) + seconds
+        if "sql_statements" not in g:
+            g.sql_statements = Counter()
+        g.sql_statements[statement] += 1
+
+
+@app.after_request
+def _server_timing(response: Response) -> Response:
+    if not app.config.get("SQL_TIMING_ENABLED", True):
+        return response
+    count = g.get("sql_count", 0)
+    if not response.is_streamed:
+        response.headers.add("Server-Timing", 'db;dur={:.3f};desc="{} queries"'.format(
+            g.get("sql_seconds", 0.0) * 1000, count))
+    threshold = app.config.get("SQL_REPEATED_STATEMENT_THRESHOLD", 10)
+    if count > threshold:
+        for statement, times in g.sql_statements.most_common():
+            if times <= threshold:
+                break
+            app.logger.warning("Possible N+1 query: statement ran %d times in %s %s: %s", times, request.method,
+                               request.endpoint, statement)
+    return response
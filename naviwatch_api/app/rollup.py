@@ -0,0 +1,220 @@
+from app import app, db, models, cache, archive
+from sqlalchemy import and_, bindparam, case, event, func, text, Date, DateTime, Table
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import Session
+from collections import Counter, defaultdict
+import click
+import datetime
+from typing import Dict, List, Tuple, Optional, Type, Any
+
+
+"""
+Incrementally maintained DailyPetStats rollup. Every flush that creates, updates or deletes a Food, Watercheck or Toilet
+row adjusts the matching (pet_xid, day) counters in the same transaction, so the dashboard can read per day totals
+without scanning the event tables. "flask rebuild-daily-stats" recomputes the table from scratch.
+"""
+
+""" event model -> {rollup counter: boolean column counted, or None to count every row} """
+COUNTERS = {
+    models.Food: {"feeds": None},
+    models.Watercheck: {"waterchecks": None},
+    models.Toilet: {"pees": "pee", "poos": "poo", "accidents": "accidnet"},
+}
+
+COUNTER_NAMES = [name for counters in COUNTERS.values() for name in counters]
+
+Key = Tuple[int, datetime.date]
+
+
+def contribution(model: Type[models.Base], values: Dict[str, Any], sign: int = 1) -> Optional[Tuple[Key, Counter]]:
+    """
+    Returns the rollup key and counter deltas for one event row
+
+    Args:
+        model: event model, one of COUNTERS
+        values: column values of the event row
+        sign: 1 when the row is added, -1 when it is removed
+
+    Returns:
+        tuple ((pet_xid, day), Counter): if the row has a pet and a creation date
+        None: otherwise
+
+    """
+    if values.get("pet_xid") is None or values.get("date_created") is None:
+        return None
+    counters = Counter({name: sign * (1 if column is None else int(bool(values.get(column))))
+                        for name, column in COUNTERS[model].items()})
+    return (values["pet_xid"], values["date_created"].date()), counters
+
+
+def _values(obj: models.Base, previous: bool = False) -> Dict[str, Any]:
+    """
+    Returns the rollup relevant column values of an ORM event instance, as they were when loaded if previous is True
+
+    Args:
+        obj: event model instance
+        previous: return the values from before the pending changes
+
+    Returns:
+        dict: column name -> value
+
+    """
+    state = inspect(obj)
+    values = dict()
+    for key in ["pet_xid", "date_created"] + [column for column in COUNTERS[type(obj)].values() if column]:
+        history = state.attrs[key].history
+        if previous and history.deleted:
+            values[key] = history.deleted[0]
+        else:
+            values[key] = getattr(obj, key)
+    return values
+
+
+def _sqlite_upsert(table: Table, row: Dict[str, Any], counters: Dict[str, int]) -> Tuple[Any, Dict[str, Any]]:
+    """ INSERT ... ON CONFLICT DO UPDATE statement and parameters for one rollup row (SQLite 3.24+) """
+    statement = text(
+        'INSERT INTO "{table}" ({columns}) VALUES ({values}) '
+        'ON CONFLICT (pet_xid, day) DO UPDATE SET {increments}, date_modified = :date_created'.format(
+            table=table.name, columns=", ".join(row), values=", ".join(":" + name for name in row),
+            increments=", ".join("{0} = {0} + :delta_{0}".format(name) for name in counters)))
+    statement = statement.bindparams(bindparam("day", type_=Date), bindparam("date_created", type_=DateTime))
+    return statement, dict(row, **{"delta_" + name: delta for name, delta in counters.items()})
+
+
+def apply(connection: Any, deltas: Dict[Key, Counter]) -> None:
+    """
+    Adds counter deltas to DailyPetStats with atomic "counter = counter + delta" updates. Keys with an increment are
+    upserted (ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT DO UPDATE on SQLite, elsewhere an insert in a savepoint
+    that falls back to the update), so concurrent first events of a pet and day can't fail the write they belong to.
+    Keys that only decrement are updated, since a missing row (e.g. deleted along with its pet) has nothing to remove.
+
+    Args:
+        connection: Sqlalchemy connection taking part in the current transaction
+        deltas: (pet_xid, day) -> Counter of deltas
+
+    Returns:
+        None
+
+    """
+    table = models.DailyPetStats.__table__
+    dialect = connection.dialect.name
+    now = datetime.datetime.utcnow()
+    for (pet_xid, day), counters in deltas.items():
+        counters = {name: delta for name, delta in counters.items() if delta}
+        if not counters:
+            continue
+        increments = {name: table.c[name] + delta for name, delta in counters.items()}
+        update = table.update().where(and_(table.c.pet_xid == pet_xid, table.c.day == day)) \
+            .values(increments, date_modified=now)
+        if all(delta < 0 for delta in counters.values()):
+            connection.execute(update)
+            continue
+        row = dict({name: 0 for name in COUNTER_NAMES}, pet_xid=pet_xid, day=day, date_created=now,
+                   **{name: max(delta, 0) for name, delta in counters.items()})
+        if dialect == "mysql":
+            connection.execute(mysql.insert(table).values(row)
+                               .on_duplicate_key_update(dict(increments, date_modified=now)))
+        elif dialect == "sqlite":
+            connection.execute(*_sqlite_upsert(table, row, counters))
+        elif connection.execute(update).rowcount == 0:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(row))
+            except IntegrityError:
+                connection.execute(update)
+
+
+def record_inserts(session: Session, model: Type[models.Base], rows: List[Dict[str, Any]]) -> None:
+    """
+    Applies the rollup deltas for rows written with core inserts, which bypass the ORM flush hook (see bulk_insert)
+
+    Args:
+        session: Sqlalchemy session the rows were inserted through
+        model: <Sqlalchemy model>
+        rows: column values of the inserted rows
+
+    Returns:
+        None
+
+    """
+    if model not in COUNTERS:
+        return
+    deltas = defaultdict(Counter)
+    for row in rows:
+        delta = contribution(model, row)
+        if delta:
+            deltas[delta[0]].update(delta[1])
+    if deltas:
+        apply(session.connection(), deltas)
+        cache.touch(session, models.DailyPetStats.__tablename__)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    """
+    Folds the creates, updates and deletes of event rows in this flush into DailyPetStats. Runs after the flush so
+    foreign keys set through relationships and column defaults (date_created) are populated; session.new, dirty and
+    deleted and attribute history still describe the flushed changes at this point.
+    """
+    deltas = defaultdict(Counter)
+    changes = [(obj, 1, False) for obj in session.new] + \
+              [(obj, -1, True) for obj in session.deleted] + \
+              [(obj, 0, False) for obj in session.dirty if session.is_modified(obj)]
+    for obj, sign, previous in changes:
+        model = type(obj)
+        if model not in COUNTERS:
+            continue
+        if sign:
+            parts = [contribution(model, _values(obj, previous), sign)]
+        else:
+            parts = [contribution(model, _values(obj, True), -1), contribution(model, _values(obj), 1)]
+        for part in parts:
+            if part:
+                deltas[part[0]].update(part[1])
+    if deltas:
+        apply(session.connection(), deltas)
+        cache.touch(session, models.DailyPetStats.__tablename__)
+
+
+def rebuild() -> int:
+    """
+    Recomputes DailyPetStats from the event tables and their archive tables with one GROUP BY query per table and
+    replaces its contents
+
+    Returns:
+        int: number of rollup rows written
+
+    """
+    totals = defaultdict(Counter)
+    for event_model, counters in COUNTERS.items():
+        for model in (event_model, archive.ARCHIVES[event_model]):
+            day_column = func.date(model.date_created)
+            sums = [func.count(model.xid) if column is None else func.sum(case([(getattr(model, column), 1)], else_=0))
+                    for column in counters.values()]
+            query = db.session.query(model.pet_xid, day_column, *sums) \
+                .filter(model.pet_xid.isnot(None), model.date_created.isnot(None)) \
+                .group_by(model.pet_xid, day_column)
+            for pet_xid, day, *values in query:
+                if isinstance(day, str):
+                    day = datetime.date.fromisoformat(day)
+                totals[(pet_xid, day)].update(dict(zip(counters, (int(value or 0) for value in values))))
+
+    now = datetime.datetime.utcnow()
+    db.session.query(models.DailyPetStats).delete()
+    rows = [dict({name: 0 for name in COUNTER_NAMES},
+                 pet_xid=pet_xid, day=day, date_created=now, **counters)
+            for (pet_xid, day), counters in totals.items()]
+    chunk = app.config.get("BULK_INSERT_CHUNK_SIZE", 500)
+    for start in range(0, len(rows), chunk):
+        db.session.execute(models.DailyPetStats.__table__.insert().values(rows[start:start + chunk]))
+    cache.touch(db.session, models.DailyPetStats.__tablename__)
+    db.session.commit()
+    return len(rows)
+
+
+@app.cli.command("rebuild-daily-stats")
+def rebuild_daily_stats() -> None:
+    """ Rebuild the DailyPetStats rollup table from the event tables """
+    click.echo("Wrote {} DailyPetStats rows".format(rebuild()))
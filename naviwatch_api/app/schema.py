@@ -1,5 +1,5 @@
 from sqlalchemy.inspection import inspect
-from marshmallow import post_dump, validates_schema, ValidationError, fields
+from marshmallow import post_dump, fields
 from app import models, ma, db
 from typing import List, Dict, Optional, Union
 
@@ -96,23 +96,6 @@ class PersonSchema(BaseSchema):
     stuff = fields.Nested('StuffSchema',
                           many=True)
 
-    @validates_schema
-    def _validate_Person(self, data):
-        """
-
-        Args:
-            data: field validated instance of models.Person
-
-        Returns:
-            None
-
-        Raises:
-            ValidationError: if a Person with the specified name already exists
-        """
-        if db.session.query(models.Person).filter(models.Person.name == data["name"]).count() == 1:
-            raise ValidationError(
-                "Person with Name '{}' already exists".format(data["name"]), 'name')
-
 
 class PetSchema(BaseSchema):
     """
@@ -121,6 +104,7 @@ class PetSchema(BaseSchema):
     class Meta:
         model = models.Pet
         fields = _includeprops(model=model,
+                               exclude=['daily_stats'],
                                excludeids=False)
 
     food = fields.Nested('FoodSchema',
@@ -132,23 +116,6 @@ class PetSchema(BaseSchema):
     toilet = fields.Nested('ToiletSchema',
                           many=True)
 
-    @validates_schema
-    def _validate_Pet(self, data):
-        """
-
-        Args:
-            data: field validated instance of models.Pet
-
-        Returns:
-            None
-
-        Raises:
-            ValidationError: if a Pet with the specified name already exists
-        """
-        if db.session.query(models.Pet).filter(models.Pet.name == data["name"]).count() == 1:
-            raise ValidationError(
-                "Pet with Name '{}' already exists".format(data["name"]), 'name')
-
 
 class FoodSchema(BaseSchema):
     """
@@ -190,6 +157,17 @@ class ToiletSchema(BaseSchema):
                                excludeids=False)
 
 
+class DailyPetStatsSchema(BaseSchema):
+    """
+
+    """
+    class Meta:
+        model = models.DailyPetStats
+        fields = _includeprops(model=model,
+                               exclude=['pet'],
+                               excludeids=False)
+
+
 ###############################################################################
 
 class ThingSchema(BaseSchema):
@@ -205,23 +183,6 @@ class ThingSchema(BaseSchema):
     stuff = fields.Nested('StuffSchema',
                           many=True)
 
-    @validates_schema
-    def _validate_thing(self, data):
-        """
-
-        Args:
-            data: field validated instance of models.Thing
-
-        Returns:
-            None
-
-        Raises:
-            ValidationError: if a thing with the specified name already exists
-        """
-        if db.session.query(models.Thing).filter(models.Thing.name == data["name"]).count() == 1:
-            raise ValidationError(
-                "Thing with Name '{}' already exists".format(data["name"]), 'name')
-
 
 class StuffSchema(BaseSchema):
     """
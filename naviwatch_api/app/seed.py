@@ -0,0 +1,200 @@
+from app import app, db, models, cache, rollup
+import click
+import datetime
+import random
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+Synthetic data for development and benchmarking. "flask seed" creates people and pets and fills the event tables with
+a history of N years: each pet gets a fixed number of events of each type per day, following a daily schedule per event
+type (feeds around breakfast, dinner and lunch, walks morning and evening, the odd toilet trip at night) with random
+jitter. With numpy installed the timestamps of a pet and event type are drawn as whole arrays of second offsets from
+one start time; without it they fall back to one draw per event in Python (same distribution, different sequence for
+a given seed). Rows are generated lazily, and they are written with chunked executemany core inserts (one commit per
+chunk) so memory stays flat regardless of volume. The DailyPetStats rollup is rebuilt once at the end.
+"""
+
+""" default events per pet per day """
+PER_DAY = {
+    models.Food: 3,
+    models.Watercheck: 2,
+    models.Activities: 2,
+    models.Toilet: 5,
+}
+
+""" model -> (daily slots as (hour of day, standard deviation in minutes), share of events at random times overnight);
+the n-th event of a day uses the n-th slot, so with fewer events per day than slots the first slots are used """
+SCHEDULES: Dict[Type[models.Base], Tuple[List[Tuple[float, float]], float]] = {
+    models.Food: ([(7, 20), (18, 20), (12.5, 30)], 0.0),
+    models.Watercheck: ([(7.5, 30), (19, 45), (13, 60)], 0.0),
+    models.Activities: ([(7.25, 30), (17.5, 45), (13, 90)], 0.01),
+    models.Toilet: ([(6.75, 20), (17, 30), (22, 20), (12, 45), (9.5, 60)], 0.03),
+}
+
+""" overnight events fall uniformly between midnight and this many seconds """
+OVERNIGHT = 5 * 3600
+
+""" model -> function of (random, pet_xid, person_xid) returning the event specific columns """
+COLUMNS: Dict[Type[models.Base], Callable[[random.Random, int, int], Dict[str, Any]]] = {
+    models.Food: lambda rng, pet, person: {"foodtype": rng.choice(("dry", "wet", "treat")),
+                                           "pet_xid": pet, "person_xid": person},
+    models.Watercheck: lambda rng, pet, person: {"act_type": rng.choice(("checked", "refilled")),
+                                                 "comment": rng.choice((None, "bowl was empty", "cleaned bowl")),
+                                                 "pet_xid": pet, "person_xid": person},
+    models.Activities: lambda rng, pet, person: {"act_type": rng.choice(("walk", "play", "training")),
+                                                 "comment": rng.choice((None, "walk around the park", "fetch",
+                                                                        "long walk by the river")),
+                                                 "pet_xid": pet, "Person_xid": person},
+    models.Toilet: lambda rng, pet, person: {"pee": rng.random() < 0.8, "poo": rng.random() < 0.4,
+                                             "accidnet": rng.random() < 0.03,
+                                             "pet_xid": pet, "person_xid": person},
+}
+
+
+def timestamps(rng: random.Random, start: datetime.datetime, days: int, per_day: int,
+               schedule: Tuple[List[Tuple[float, float]], float]) -> List[datetime.datetime]:
+    """
+    Returns per_day times on each of days days from start, in chronological order. The n-th event of a day is drawn
+    from a normal distribution around the n-th slot of the schedule (cycling through the slots when per_day is larger),
+    except for the overnight share, which is uniform over the night. With numpy the offsets are drawn and sorted as
+    arrays (numpy's generator is seeded from rng, so runs stay reproducible); otherwise they are drawn one per event.
+
+    Args:
+        rng: random generator
+        start: midnight of the first day
+        days: number of days
+        per_day: events per day
+        schedule: (slots, overnight share), see SCHEDULES
+
+    Returns:
+        list: datetimes
+
+    """
+    slots, overnight = schedule
+    slots = [(hour * 3600, minutes * 60) for hour, minutes in slots]
+    if numpy is not None:
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        slot = numpy.arange(per_day) % len(slots)
+        means = numpy.array([mean for mean, _ in slots], dtype=float)[slot]
+        sigmas = numpy.array([sigma for _, sigma in slots], dtype=float)[slot]
+        seconds = generator.normal(means, sigmas, size=(days, per_day))
+        night = generator.random((days, per_day)) < overnight
+        seconds = numpy.where(night, generator.integers(0, OVERNIGHT, size=(days, per_day)), seconds)
+        seconds = numpy.sort(numpy.clip(seconds, 0, 86399).astype(numpy.int64), axis=1)
+        offsets = seconds + numpy.arange(days, dtype=numpy.int64)[:, None] * 86400
+        return (numpy.datetime64(start, "us") + offsets.ravel().astype("timedelta64[s]")).tolist()
+    seconds = [rng.randrange(OVERNIGHT) if rng.random() < overnight else
+               min(86399, max(0, int(rng.gauss(*slots[index % per_day % len(slots)]))))
+               for index in range(days * per_day)]
+    offsets = [day * 86400 + second
+               for day in range(days)
+               for second in sorted(seconds[day * per_day:(day + 1) * per_day])]
+    return [start + datetime.timedelta(seconds=offset) for offset in offsets]
+
+
+def _rows(model: Type[models.Base], rng: random.Random, pets: List[int], people: List[int],
+          start: datetime.datetime, days: int, per_day: int) -> Iterator[Dict[str, Any]]:
+    for pet in pets:
+        for created in timestamps(rng, start, days, per_day, SCHEDULES[model]):
+            row = COLUMNS[model](rng, pet, rng.choice(people) if people else None)
+            row["date_created"] = created
+            yield row
+
+
+def _insert(model: Type[models.Base], rows: Iterator[Dict[str, Any]], chunk: int) -> int:
+    """ Writes rows with one executemany insert and commit per chunk, returns the row count """
+    table = model.__table__
+    count = 0
+    batch = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk:
+            db.session.execute(table.insert(), batch)
+            cache.touch(db.session, table.name)
+            db.session.commit()
+            count += len(batch)
+            batch = list()
+    if batch:
+        db.session.execute(table.insert(), batch)
+        cache.touch(db.session, table.name)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+
+def seed(days: int, pets: int = 5, people: int = 2, per_day_overrides: Optional[Dict[Type[models.Base], int]] = None,
+         chunk: Optional[int] = None, random_seed: Optional[int] = None) -> Dict[str, int]:
+    """
+    Creates people and pets and days days of events for each pet, ending today
+
+    Args:
+        days: days of history
+        pets: pets to create
+        people: people to create
+        per_day_overrides: events per pet per day by model, replacing the PER_DAY defaults
+        chunk: rows per insert, defaults to BULK_INSERT_CHUNK_SIZE
+        random_seed: seed for reproducible data
+
+    Returns:
+        dict: table name -> rows inserted
+
+    """
+    rng = random.Random(random_seed)
+    per_day = dict(PER_DAY)
+    per_day.update(per_day_overrides or dict())
+    chunk = chunk or app.config.get("BULK_INSERT_CHUNK_SIZE", 500)
+    now = datetime.datetime.utcnow()
+    start = datetime.datetime.combine(now.date() - datetime.timedelta(days=days - 1), datetime.time())
+    counts = dict()
+
+    suffix = now.strftime("%Y%m%d%H%M%S")
+    for model, count in ((models.Person, people), (models.Pet, pets)):
+        if count:
+            db.session.execute(model.__table__.insert(),
+                               [{"name": "seed {} {} {}".format(model.__name__.lower(), suffix, index),
+                                 "date_created": now} for index in range(count)])
+            cache.touch(db.session, model.__tablename__)
+        counts[model.__tablename__] = count
+    db.session.commit()
+    person_xids = [xid for xid, in db.session.query(models.Person.xid)
+                   .filter(models.Person.name.like("seed person {} %".format(suffix)))]
+    pet_xids = [xid for xid, in db.session.query(models.Pet.xid)
+                .filter(models.Pet.name.like("seed pet {} %".format(suffix)))]
+
+    for model, count in per_day.items():
+        counts[model.__tablename__] = _insert(model, _rows(model, rng, pet_xids, person_xids, start, days, count),
+                                              chunk) if count else 0
+    rollup.rebuild()
+    return counts
+
+
+@app.cli.command("seed")
+@click.option("--years", type=float, default=1, show_default=True, help="years of history to generate")
+@click.option("--pets", type=int, default=5, show_default=True)
+@click.option("--people", type=int, default=2, show_default=True)
+@click.option("--food", type=int, default=PER_DAY[models.Food], show_default=True, help="feeds per pet per day")
+@click.option("--water", type=int, default=PER_DAY[models.Watercheck], show_default=True,
+              help="water checks per pet per day")
+@click.option("--activities", type=int, default=PER_DAY[models.Activities], show_default=True,
+              help="activities per pet per day")
+@click.option("--toilet", type=int, default=PER_DAY[models.Toilet], show_default=True,
+              help="toilet events per pet per day")
+@click.option("--chunk-size", type=int, default=None, help="rows per insert [default: BULK_INSERT_CHUNK_SIZE]")
+@click.option("--seed", "random_seed", type=int, default=None, help="random seed for reproducible data")
+def seed_command(years: float, pets: int, people: int, food: int, water: int, activities: int, toilet: int,
+                 chunk_size: Optional[int], random_seed: Optional[int]) -> None:
+    """ Generate years of synthetic people, pets and events """
+    started = datetime.datetime.utcnow()
+    counts = seed(max(1, int(round(years * 365))), pets, people,
+                  {models.Food: food, models.Watercheck: water, models.Activities: activities, models.Toilet: toilet},
+                  chunk_size, random_seed)
+    seconds = (datetime.datetime.utcnow() - started).total_seconds()
+    for table, count in counts.items():
+        click.echo("{:>12} {}".format(count, table))
+    click.echo("Seeded {} rows in {:.1f}s".format(sum(counts.values()), seconds))
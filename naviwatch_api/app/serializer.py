@@ -0,0 +1,190 @@
+from app import app
+from flask import json, Response
+from marshmallow import fields
+from marshmallow_sqlalchemy.fields import Related
+from sqlalchemy import inspect, Boolean, Integer, String
+import datetime
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+"""
+Compiled serializers for collection dumps. A dump schema's fields are turned once into a plan of (row index, output
+key, formatter) entries over the model's columns, so a row can be serialized straight from a core result tuple: no ORM
+instance is built, and marshmallow's per field attribute lookup, error handling and skip_null post dump hook are
+replaced by an inline loop that drops null values. Values of the types the columns normally return (int, str, bool,
+naive datetime) are formatted inline; anything else goes through the marshmallow field's own _serialize, so the schemas
+stay the specification of the output. Schemas that need ORM objects (nested collections, many valued relations, method
+fields or extra dump hooks) are not compiled and keep using marshmallow.
+
+A many-to-one relation (e.g. "pet") is dumped from its foreign key column rather than by loading the related row. The
+two only differ for foreign keys that point at a missing row, which the ORM path dumps as absent.
+
+encode() produces the same text as flask.jsonify. For payloads of str, int, bool and None it uses orjson or ujson when
+one is installed and the result is plain printable ASCII, which is when their output matches the stdlib encoder byte
+for byte (they format floats differently, hence the type restriction), and the stdlib otherwise.
+"""
+
+Plan = List[Tuple[int, str, Tuple[type, ...], Callable[[Any], Any]]]
+
+""" output that the fast encoders could write differently from json.dumps(ensure_ascii=True) """
+_UNSAFE = re.compile(r"[^\x20-\x7e]|\\u")
+
+
+class Serializer(object):
+    """
+    Row tuple to dict function compiled from a schema
+
+    Args:
+        columns: column attributes to select, in row order
+        plan: (row index, output key, types output unchanged, formatter for any other value) per dumped field
+        is_not_null: the schema's null test, applied to formatted values
+        plain: every dumped value is a str, int, bool or None (see encode)
+
+    """
+
+    def __init__(self, columns: List[Any], plan: Plan, is_not_null: Callable[[Any], bool], plain: bool) -> None:
+        self.columns = columns
+        self.plan = plan
+        self.is_not_null = is_not_null
+        self.plain = plain
+
+    def dump(self, row: Sequence[Any]) -> Dict[str, Any]:
+        """
+        Args:
+            row: result tuple with self.columns
+
+        Returns:
+            dict: what the schema's dump returns for the same row
+
+        """
+        data = dict()
+        for index, key, exact, format_value in self.plan:
+            value = row[index]
+            if value.__class__ not in exact:
+                value = format_value(value)
+                if not self.is_not_null(value):
+                    continue
+            data[key] = value
+        return data
+
+    def dump_many(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        dump = self.dump
+        return [dump(row) for row in rows]
+
+
+def _field_serializer(field: fields.Field, name: str) -> Callable[[Any], Any]:
+    return lambda value: field._serialize(value, name, None)
+
+
+def _datetime_serializer(field: fields.DateTime, name: str) -> Callable[[Any], Any]:
+    fallback = _field_serializer(field, name)
+
+    def serialize(value: Any) -> Any:
+        # utils.isoformat treats naive datetimes as UTC
+        if value.__class__ is datetime.datetime and value.tzinfo is None:
+            return value.isoformat() + "+00:00"
+        return fallback(value)
+    return serialize
+
+
+def compile_schema(dump_schema: Any) -> Optional[Serializer]:
+    """
+    Builds a Serializer equivalent to dump_schema (a single row BaseSchema instance, with only/exclude applied)
+
+    Args:
+        dump_schema: schema instance
+
+    Returns:
+        Serializer: the compiled serializer, or None if the schema has fields that need ORM objects
+
+    """
+    hooks = {tag: names for tag, names in type(dump_schema)._hooks.items() if names and "dump" in tag[0]}
+    if hooks != {("post_dump", False): ["skip_null"]}:
+        return None
+    mapper = inspect(dump_schema.opts.model)
+    columns = ["xid", "date_created"]
+    steps = list()
+    plain = True
+    for name, field in dump_schema.fields.items():
+        if field.load_only:
+            continue
+        attribute = field.attribute or name
+        key = field.data_key or name
+        if isinstance(field, Related):
+            relation = mapper.relationships.get(attribute)
+            if relation is None or relation.uselist or len(relation.local_columns) != 1 or \
+                    [column.key for column in field.related_keys] != \
+                    [column.key for column in relation.remote_side]:
+                return None
+            column = next(iter(relation.local_columns)).key
+            steps.append((column, key, (int, str), lambda value: value))
+        elif attribute in mapper.column_attrs and field._CHECK_ATTRIBUTE:
+            if isinstance(field, fields.DateTime) and field.format == "iso":
+                steps.append((attribute, key, (), _datetime_serializer(field, name)))
+            elif isinstance(field, fields.Integer) and not field.as_string:
+                steps.append((attribute, key, (int,), _field_serializer(field, name)))
+            elif isinstance(field, fields.String):
+                steps.append((attribute, key, (str,), _field_serializer(field, name)))
+            elif isinstance(field, fields.Boolean):
+                steps.append((attribute, key, (bool,), _field_serializer(field, name)))
+            elif isinstance(field, fields.Inferred):
+                steps.append((attribute, key, (int, str, bool), _field_serializer(field, name)))
+                plain = plain and isinstance(mapper.column_attrs[attribute].columns[0].type, (Integer, String, Boolean))
+            else:
+                steps.append((attribute, key, (), _field_serializer(field, name)))
+                plain = False
+        else:
+            return None
+        if steps[-1][0] not in columns:
+            columns.append(steps[-1][0])
+    plan = [(columns.index(column), key, exact, format_value) for column, key, exact, format_value in steps]
+    model = dump_schema.opts.model
+    return Serializer([getattr(model, column) for column in columns], plan, dump_schema.is_not_null, plain)
+
+
+def _fast_dumps(obj: Any) -> Optional[str]:
+    try:
+        if orjson is not None:
+            text = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        elif ujson is not None:
+            text = ujson.dumps(obj, sort_keys=True, ensure_ascii=False, escape_forward_slashes=False)
+        else:
+            return None
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return None if _UNSAFE.search(text) else text
+
+
+def encode(obj: Any, plain: bool = False) -> str:
+    """
+    Args:
+        obj: JSON serializable object
+        plain: obj is made only of dicts, lists, str, int, bool and None, so a fast encoder may be used
+
+    Returns:
+        str: the body flask.jsonify(obj) would send
+
+    """
+    if app.config["JSONIFY_PRETTYPRINT_REGULAR"] or app.debug:
+        return json.dumps(obj, indent=2, separators=(", ", ": ")) + "\n"
+    if plain and app.config["JSON_SORT_KEYS"] and app.config["JSON_AS_ASCII"]:
+        text = _fast_dumps(obj)
+        if text is not None:
+            return text + "\n"
+    return json.dumps(obj, separators=(",", ":")) + "\n"
+
+
+def jsonify(obj: Any, plain: bool = False) -> Response:
+    """ flask.jsonify for a single object, encoded with encode() """
+    return app.response_class(encode(obj, plain), mimetype=app.config["JSONIFY_MIMETYPE"])
@@ -0,0 +1,220 @@
+from app import app, db, models, cache, rollup, events
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.inspection import inspect
+from collections import OrderedDict, defaultdict
+from threading import Lock, Thread
+import atexit
+import os
+import queue
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+
+"""
+Asynchronous write queue with group commit. With WRITE_QUEUE_ENABLED, POSTs to the event tables are validated, put on
+an in-memory queue and answered with 202 and a tracking id. A background thread drains the queue and inserts up to
+WRITE_QUEUE_MAX_BATCH rows, or whatever arrived within WRITE_QUEUE_MAX_DELAY_MS of the first one, in one transaction,
+so a burst of posts costs one commit instead of one per row. If a batch fails it is retried row by row so one bad row
+only fails itself.
+
+Queued rows live in process memory until committed: rows accepted by a process that is killed before its writer
+catches up are lost.
+"""
+
+Item = Tuple[str, Type[models.Base], Dict[str, Any]]
+
+
+class Writer(object):
+    """
+    Background group commit writer
+
+    Args:
+        max_batch: maximum rows per transaction
+        max_delay: seconds to wait for more rows after the first row of a batch
+        max_depth: queued rows above which submit refuses new rows
+        status_size: number of tracking ids whose status is kept
+
+    """
+
+    def __init__(self, max_batch: int, max_delay: float, max_depth: int, status_size: int) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_depth = max_depth
+        self.status_size = status_size
+        self.counters = {"enqueued": 0, "rejected": 0, "committed": 0, "failed": 0, "batches": 0}
+        self.last_batch = {"rows": 0, "milliseconds": 0.0}
+        self._queue: queue.Queue = queue.Queue()
+        self._statuses: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_started(self) -> None:
+        """ Starts the writer thread on first use, and again in a forked worker (threads do not survive fork) """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="naviwatch-writer", daemon=True)
+                self._thread.start()
+
+    def _set_status(self, tracking_id: str, status: Dict[str, Any]) -> None:
+        with self._lock:
+            self._statuses[tracking_id] = status
+            while len(self._statuses) > self.status_size:
+                self._statuses.popitem(last=False)
+
+    def submit(self, model: Type[models.Base], values: Dict[str, Any]) -> Optional[str]:
+        """
+        Queues one validated row for insertion
+
+        Args:
+            model: <Sqlalchemy model>
+            values: column values
+
+        Returns:
+            str: tracking id
+            None: if the queue is full
+
+        """
+        self._ensure_started()
+        if self._queue.qsize() >= self.max_depth:
+            with self._lock:
+                self.counters["rejected"] += 1
+            return None
+        tracking_id = uuid.uuid4().hex
+        self._set_status(tracking_id, {"status": "queued", "table": model.__tablename__})
+        with self._lock:
+            self.counters["enqueued"] += 1
+        self._queue.put((tracking_id, model, values))
+        return tracking_id
+
+    def status(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            dict: status ("queued", "committed" or "failed"), table, and xid or error once written
+            None: if tracking_id is unknown or has been evicted
+
+        """
+        with self._lock:
+            status = self._statuses.get(tracking_id)
+            return dict(status) if status else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters,
+                        depth=self._queue.qsize(),
+                        max_depth=self.max_depth,
+                        max_batch=self.max_batch,
+                        max_delay_ms=self.max_delay * 1000,
+                        last_batch=dict(self.last_batch),
+                        running=bool(self._thread and self._thread.is_alive() and self._pid == os.getpid()))
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ Flushes the queued rows and stops the writer thread """
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        with app.app_context():
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._write(batch)
+
+    def _write(self, batch: List[Item]) -> None:
+        """ Commits batch in one transaction, falling back to one transaction per row if that fails """
+        started = time.monotonic()
+        try:
+            results = self._insert(batch)
+        except Exception:
+            db.session.rollback()
+            results = dict()
+            for item in batch:
+                try:
+                    results.update(self._insert([item]))
+                except SQLAlchemyError as err:
+                    db.session.rollback()
+                    results[item[0]] = {"status": "failed", "error": str(getattr(err, "orig", None) or err)}
+                except Exception as err:
+                    db.session.rollback()
+                    results[item[0]] = {"status": "failed", "error": str(err)}
+        finally:
+            db.session.remove()
+
+        for tracking_id, model, _ in batch:
+            self._set_status(tracking_id, dict(results[tracking_id], table=model.__tablename__))
+        with self._lock:
+            failed = sum(1 for result in results.values() if result["status"] == "failed")
+            self.counters["committed"] += len(batch) - failed
+            self.counters["failed"] += failed
+            self.counters["batches"] += 1
+            self.last_batch = {"rows": len(batch), "milliseconds": round((time.monotonic() - started) * 1000, 3)}
+
+    def _insert(self, batch: List[Item]) -> Dict[str, Dict[str, Any]]:
+        """
+        Inserts the rows of batch whose foreign keys exist and commits once. Missing references are checked with one
+        IN query per related model, as in bulk inserts.
+
+        Returns:
+            dict: tracking id -> status
+
+        """
+        results = dict()
+        wanted = defaultdict(set)
+        references = dict()
+        for _, model, values in batch:
+            if model not in references:
+                references[model] = [(list(relation.local_columns)[0].key, relation.mapper.class_)
+                                     for relation in inspect(model).relationships if not relation.uselist]
+            for fk, related in references[model]:
+                if values.get(fk) is not None:
+                    wanted[related].add(values[fk])
+        found = {related: {xid for xid, in db.session.query(related.xid).filter(related.xid.in_(xids))}
+                 for related, xids in wanted.items()}
+
+        inserted = defaultdict(list)
+        for tracking_id, model, values in batch:
+            missing = {fk: ["{} {} does not exist".format(related.__name__, values[fk])]
+                       for fk, related in references[model]
+                       if values.get(fk) is not None and values[fk] not in found[related]}
+            if missing:
+                results[tracking_id] = {"status": "failed", "error": missing}
+                continue
+            xid = db.session.execute(model.__table__.insert().values(values)).inserted_primary_key[0]
+            results[tracking_id] = {"status": "committed", "xid": xid}
+            inserted[model].append(dict(values, xid=xid))
+
+        for model, rows in inserted.items():
+            cache.touch(db.session, model.__tablename__)
+            rollup.record_inserts(db.session, model, rows)
+            for row in rows:
+                events.record(db.session, "created", model.__tablename__, row, row.get("pet_xid"))
+        db.session.commit()
+        return results
+
+
+writer = Writer(app.config.get("WRITE_QUEUE_MAX_BATCH", 500),
+                app.config.get("WRITE_QUEUE_MAX_DELAY_MS", 20) / 1000,
+                app.config.get("WRITE_QUEUE_MAX_DEPTH", 10000),
+                app.config.get("WRITE_QUEUE_STATUS_SIZE", 100000))
+
+atexit.register(writer.stop)
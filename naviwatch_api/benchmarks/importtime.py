@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+
+"""
+Worker cold start budget. Runs "python -X importtime" on the statement a worker executes at boot (importing the app and
+calling create_app) in a fresh interpreter, reports the slowest imports, and exits with status 1 if the total import
+time exceeds the budget or a module that must stay lazy (flasgger, the debug toolbar) was imported.
+
+    python3 benchmarks/importtime.py --budget-ms 1500
+"""
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATEMENT = "from app import create_app; create_app(DEBUG=False)"
+FORBIDDEN = ("flasgger", "flask_debugtoolbar", "jsonschema")
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(runs: int) -> Tuple[float, List[Tuple[int, int, str]]]:
+    """
+    Args:
+        runs: number of fresh interpreters to time; the fastest run is reported to reduce noise
+
+    Returns:
+        tuple (float, list): total import time in ms, [(self us, cumulative us, module)] of the fastest run
+
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", STATEMENT], cwd=BASEDIR,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        if result.returncode:
+            sys.exit(result.stderr)
+        modules = list()
+        total = 0
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if match:
+                own, cumulative, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+                modules.append((own, cumulative, name))
+                if len(indent) == 1:
+                    total += cumulative
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best[0] / 1000, best[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Worker cold start import time budget")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", 1500)),
+                        help="maximum total import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=3, help="interpreters to time, the fastest one counts")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    total, modules = measure(args.runs)
+    for own, cumulative, name in sorted(modules, key=lambda module: module[1], reverse=True)[:args.top]:
+        print("{:>10.1f} ms {:>10.1f} ms  {}".format(cumulative / 1000, own / 1000, name))
+
+    failed = False
+    imported = sorted({name for _, _, name in modules if name.split(".")[0] in FORBIDDEN})
+    if imported:
+        print("FAIL: imported at start up: {}".format(", ".join(imported)))
+        failed = True
+    if total > args.budget_ms:
+        print("FAIL: import time {:.1f} ms exceeds budget of {:.1f} ms".format(total, args.budget_ms))
+        failed = True
+    else:
+        print("import time {:.1f} ms (budget {:.1f} ms)".format(total, args.budget_ms))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
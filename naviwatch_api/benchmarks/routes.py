@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+"""
+Route latency benchmark. Builds a file backed SQLite database in a temporary directory, seeds it with a configurable
+volume of people, pets, things and events (see app/seed.py), and times every GET, POST, PUT and DELETE route, the
+by-name upserts and the _bulk inserts in process through the Flask test client.
+Reports p50/p95/p99 latency and throughput per route as JSON, and with --baseline compares p95 against a previous run,
+exiting with status 1 if any route got slower than the tolerance allows.
+
+    python3 benchmarks/routes.py --output benchmarks/baseline.json
+    python3 benchmarks/routes.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+Baselines are only comparable when produced on the same machine with the same volumes.
+"""
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASEDIR)
+
+JSON_HEADERS = {"Accept": "application/json"}
+
+""" resource name -> factory for a POST/PUT body given a request number, a pet xid and a random generator """
+BODIES = {
+    "person": lambda i, pet, rng: {"name": "bench person {}".format(i)},
+    "pet": lambda i, pet, rng: {"name": "bench pet {}".format(i), "animal": rng.choice(["cat", "dog"])},
+    "thing": lambda i, pet, rng: {"name": "bench thing {}".format(i), "description": "a thing to benchmark"},
+    "food": lambda i, pet, rng: {"pet_xid": pet, "foodtype": rng.choice(["dry", "wet", "treat"])},
+    "water": lambda i, pet, rng: {"pet_xid": pet, "act_type": "refill", "comment": "bowl refilled"},
+    "activities": lambda i, pet, rng: {"pet_xid": pet, "act_type": "walk", "comment": "walk around the park"},
+    "toilet": lambda i, pet, rng: {"pet_xid": pet, "pee": rng.random() < 0.8, "poo": rng.random() < 0.4,
+                                   "accidnet": rng.random() < 0.05},
+}
+
+""" resources with PUT /<name>/by-name/<value> upserts and with POST /<name>/_bulk """
+UPSERTS = ("person", "pet", "thing")
+BULK = ("food", "water", "activities", "toilet")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """ nearest rank percentile of sorted values """
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))]
+
+
+def measure(call: Callable[[int], Any], requests: int, warmup: int) -> Dict[str, float]:
+    """
+    Times call(i) for i in range(requests) after warmup untimed calls; every call must return a 2xx response
+
+    Returns:
+        dict: n, mean/p50/p95/p99 latency in ms and requests per second
+
+    """
+    for i in range(warmup):
+        call(i)
+    timings = list()
+    started = time.perf_counter()
+    for i in range(requests):
+        before = time.perf_counter()
+        response = call(warmup + i)
+        timings.append((time.perf_counter() - before) * 1000)
+        if response.status_code >= 300:
+            raise RuntimeError("{} returned {}".format(call.__name__, response.status_code))
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {"n": requests,
+            "mean_ms": round(sum(timings) / len(timings), 3),
+            "p50_ms": round(percentile(timings, 0.50), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "rps": round(requests / elapsed, 1)}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="naviwatch-bench-")
+    from app import create_app, db, seed
+    app = create_app(SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(directory, "bench.db"),
+                     SQLALCHEMY_ENGINE_OPTIONS={},
+                     DEBUG=False,
+                     RESPONSE_CACHE_ENABLED=False,
+                     WRITE_QUEUE_ENABLED=False,
+                     SQL_SLOW_QUERY_MS=float("inf"),
+                     SQL_REPEATED_STATEMENT_THRESHOLD=sys.maxsize)
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        volumes = seed.seed(args.days, args.pets, args.people,
+                            per_day_overrides={model: args.per_day for model in seed.PER_DAY}, random_seed=args.seed)
+
+    client = app.test_client()
+    for i in range(args.things):
+        client.post("/thing/", json=BODIES["thing"]("seed {}".format(i), None, rng), headers=JSON_HEADERS)
+    volumes["Thing"] = args.things
+    sizes = {"person": args.people, "pet": args.pets, "thing": args.things}
+    pets = args.pets
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).date().isoformat()
+    results = dict()
+    for name in ("person", "pet", "thing", "food", "water", "activities", "toilet"):
+        body = BODIES[name]
+        rows = sizes.get(name, pets)
+        created = list()
+
+        def get_all(i: int) -> Any:
+            if name in sizes:
+                return client.get("/{}/".format(name))
+            return client.get("/{}/?pet_xid={}&since={}&limit=100".format(name, i % pets + 1, since))
+
+        def get_xid(i: int) -> Any:
+            return client.get("/{}/{}".format(name, i % rows + 1))
+
+        def post(i: int) -> Any:
+            response = client.post("/{}/".format(name), json=body(i, i % pets + 1, rng), headers=JSON_HEADERS)
+            created.append(response.get_json()["data"]["xid"])
+            return response
+
+        def put(i: int) -> Any:
+            # the same body as the POST that created the row, so unique names don't collide
+            index = i % len(created)
+            return client.put("/{}/{}".format(name, created[index]), json=body(index, index % pets + 1, rng),
+                              headers=JSON_HEADERS)
+
+        def delete(i: int) -> Any:
+            return client.delete("/{}/{}".format(name, created.pop()), headers=JSON_HEADERS)
+
+        def upsert(i: int) -> Any:
+            # the first --upsert-keys calls insert, later ones update
+            payload = {key: value for key, value in body(i, i % pets + 1, rng).items() if key != "name"}
+            return client.put("/{}/by-name/bench upsert {}".format(name, i % args.upsert_keys), json=payload,
+                              headers=JSON_HEADERS)
+
+        def bulk_post(i: int) -> Any:
+            return client.post("/{}/_bulk".format(name), json=[body(i, (i + row) % pets + 1, rng)
+                                                               for row in range(args.bulk_size)],
+                               headers=JSON_HEADERS)
+
+        calls = [("GET", "/{}/".format(name), get_all),
+                 ("GET", "/{}/<xid>".format(name), get_xid),
+                 ("POST", "/{}/".format(name), post),
+                 ("PUT", "/{}/<xid>".format(name), put),
+                 ("DELETE", "/{}/<xid>".format(name), delete)]
+        if name in UPSERTS:
+            calls.append(("PUT", "/{}/by-name/<value>".format(name), upsert))
+        if name in BULK:
+            calls.append(("POST", "/{}/_bulk".format(name), bulk_post))
+        for method, rule, call in calls:
+            results["{} {}".format(method, rule)] = measure(call, args.requests, args.warmup)
+
+    results["GET /pet/<xid>/daily"] = measure(lambda i: client.get("/pet/{}/daily".format(i % pets + 1)),
+                                              args.requests, args.warmup)
+    results["GET /pet/<xid>/summary"] = measure(lambda i: client.get("/pet/{}/summary".format(i % pets + 1)),
+                                                args.requests, args.warmup)
+    return {"meta": {"volumes": volumes,
+                     "pets": args.pets, "people": args.people, "things": args.things, "days": args.days,
+                     "per_day": args.per_day, "bulk_size": args.bulk_size, "upsert_keys": args.upsert_keys,
+                     "requests": args.requests, "warmup": args.warmup, "seed": args.seed,
+                     "python": platform.python_version(), "machine": platform.machine(),
+                     "date": datetime.datetime.utcnow().isoformat(),
+                     "directory": directory},
+            "results": results}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Returns:
+        list: one message per route whose p95 exceeds the baseline p95 by more than tolerance (a fraction)
+
+    """
+    regressions = list()
+    for route, current in sorted(report["results"].items()):
+        previous: Optional[Dict[str, float]] = baseline.get("results", dict()).get(route)
+        if previous and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append("{}: p95 {:.3f} ms vs baseline {:.3f} ms".format(route, current["p95_ms"],
+                                                                               previous["p95_ms"]))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Route latency benchmark against a seeded SQLite database")
+    parser.add_argument("--pets", type=int, default=10)
+    parser.add_argument("--people", type=int, default=5)
+    parser.add_argument("--things", type=int, default=100)
+    parser.add_argument("--days", type=int, default=90, help="days of history per pet")
+    parser.add_argument("--per-day", type=int, default=6, help="events of each type per pet per day")
+    parser.add_argument("--bulk-size", type=int, default=100, help="rows per _bulk POST")
+    parser.add_argument("--upsert-keys", type=int, default=50, help="distinct names the by-name upserts cycle through")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per route")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    report = run(args)
+    shutil.rmtree(report["meta"].pop("directory"), ignore_errors=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
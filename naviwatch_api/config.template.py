@@ -13,14 +13,88 @@ BASEDIR = os.path.abspath(os.path.dirname(__file__))
 SQLALCHEMY_DATABASE_URI = "mysql+pymysql://%s:%s@%s/%s?host=%s?port=%s" % (DATABASE['username'], DATABASE['password'],
                                                                            DATABASE['host'], DATABASE['database'],
                                                                            DATABASE['host'], DATABASE['port'])
-SQLALCHEMY_POOL_RECYCLE = 10
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 SQLALCHEMY_MIGRATE_REPO = os.path.join(BASEDIR, 'db_repository')
 
+""" Connection Pool Options """
+# per worker process. pool_recycle must stay below the server's wait_timeout (MySQL default 8 hours); pool_pre_ping
+# replaces connections the server has closed before they are handed out. Remove this dict when using SQLite.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 10,
+    "pool_recycle": 3600,
+    "pool_pre_ping": True,
+    "connect_args": {"connect_timeout": 10},
+}
+
 """ Flask Options """
 FLASK_DEBUG = True
 FLASK_HOST = "0.0.0.0"
 FLASK_PORT = 5055
+SECRET_KEY = "somesecretkey"
+
+""" Pagination Options """
+PAGINATION_DEFAULT_LIMIT = 100
+PAGINATION_MAX_LIMIT = 1000
+
+""" Serializer Options """
+# dump collections from result rows with serializers compiled from the schemas (same output, no per row marshmallow);
+# orjson or ujson is used for encoding when installed
+FAST_SERIALIZER_ENABLED = True
+
+""" Compression Options """
+# gzip (or brotli, if the brotli package is installed) for clients sending Accept-Encoding
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+COMPRESSION_CACHE_SIZE = 256
+
+""" Streaming Options """
+STREAM_BATCH_SIZE = 1000
+
+""" Export Options """
+# rows fetched from the server side cursor and encoded per chunk by /export/<entity>.<csv|arrow|parquet>
+EXPORT_BATCH_SIZE = 10000
+
+""" Bulk Insert Options """
+BULK_MAX_ROWS = 10000
+BULK_INSERT_CHUNK_SIZE = 500
+
+""" Archive Options """
+# rows per transaction for "flask archive"
+ARCHIVE_BATCH_SIZE = 1000
+
+""" Write Queue Options """
+# event POSTs return 202 and are committed in groups by a background thread; queued rows are lost if the process dies
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_MAX_BATCH = 500
+WRITE_QUEUE_MAX_DELAY_MS = 20
+WRITE_QUEUE_MAX_DEPTH = 10000
+WRITE_QUEUE_STATUS_SIZE = 100000
+
+""" Response Cache Options """
+# table versions are tracked per process; only enable when a single process serves reads and writes
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_SIZE = 1024
+
+""" Event Stream Options """
+# events are broadcast per process; a stream only carries writes committed by the process serving it
+EVENT_BUFFER_SIZE = 1000
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_RETRY_MILLISECONDS = 3000
+
+""" Query Instrumentation Options """
+# Server-Timing header with per request query count and SQL time, slow query and repeated statement (N+1) logging
+SQL_TIMING_ENABLED = True
+SQL_SLOW_QUERY_MS = 200
+SQL_REPEATED_STATEMENT_THRESHOLD = 10
+
+""" Metrics Options """
+# /metrics in Prometheus text format; values are per worker process
+METRICS_ENABLED = True
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
 
 """ Swagger Options """
 SWAGGER_HOST = "{}:{}".format("localhost", FLASK_PORT)
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
-from app import app
+import config
+from app import create_app
+
+
+app = create_app(DEBUG=config.FLASK_DEBUG)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+import os
+
+
+""" gunicorn -c gunicorn.conf.py wsgi:app """
+bind = os.environ.get("NAVIWATCH_BIND", "0.0.0.0:5155")
+workers = int(os.environ.get("NAVIWATCH_WORKERS", 8))
+
+# threaded workers: every open /events/stream and long /export holds one thread rather than a whole worker, and since
+# a gthread worker heartbeats the arbiter from its main loop, timeout only catches hung workers and never cuts off a
+# long response. Keep threads at or below the pool's pool_size + max_overflow (config.py)
+worker_class = "gthread"
+threads = int(os.environ.get("NAVIWATCH_THREADS", 8))
+timeout = 30
+keepalive = 5
+
+# import the app once in the master; workers share its memory copy-on-write and start faster. Connections are never
+# shared across the fork: a worker discards any pooled connection opened by another process (see app/__init__.py)
+preload_app = True
@@ -1,4 +1,4 @@
 #!/bin/bash
 
 
-gunicorn --bind 0.0.0.0:5155 run:app --workers 8
+gunicorn -c gunicorn.conf.py wsgi:app
@@ -0,0 +1,56 @@
+import os
+import sys
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+"""
+Test fixtures: the app is configured once per session against a SQLite file with foreign keys enforced (as on MySQL),
+and every test starts from empty tables.
+"""
+
+
+class TestConfig(object):
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = "test"
+    DEBUG = False
+    TESTING = True
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    from app import create_app, db, poolstats
+    app = create_app(TestConfig,
+                     SQLALCHEMY_DATABASE_URI="sqlite:///" + str(tmp_path_factory.mktemp("db") / "test.db"))
+    with app.app_context():
+        event.listen(db.engine, "connect", _enable_foreign_keys)
+        db.engine.dispose()
+        poolstats.instrument(db.engine)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from app import db
+    with app.app_context():
+        db.create_all()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    client = app.test_client()
+    client.environ_base["HTTP_ACCEPT"] = "application/json"
+    yield client
+    db.session.remove()
+
+
+@pytest.fixture
+def pet(client):
+    """ xid of a pet and its owner, created through the API """
+    client.post("/person/", json={"name": "Alice"})
+    return client.post("/pet/", json={"name": "Rex", "animal": "dog"}).get_json()["data"]["xid"]
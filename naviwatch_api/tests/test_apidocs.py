@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+
+def test_start_up_does_not_import_flasgger(tmp_path):
+    statement = "; ".join([
+        "import sys",
+        "from app import create_app",
+        "create_app(type('Config', (object,), dict(SQLALCHEMY_TRACK_MODIFICATIONS=False)), "
+        "SQLALCHEMY_DATABASE_URI='sqlite:///{}', DEBUG=False)".format(tmp_path / "start.db"),
+        "print(sorted(name for name in ('flasgger', 'flask_debugtoolbar', 'jsonschema') if name in sys.modules))"])
+    result = subprocess.run([sys.executable, "-c", statement], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), universal_newlines=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_spec_is_generated_on_first_request(client):
+    spec = client.get("/apispec_1.json")
+    assert spec.status_code == 200
+    assert "/thing/" in spec.get_json()["paths"]
+    assert client.get("/apispec_1.json").get_json() == spec.get_json()
+    assert client.get("/apidocs/").status_code == 200
@@ -0,0 +1,33 @@
+from app import create_app
+from conftest import TestConfig
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+
+def test_create_app_returns_configured_app(app):
+    assert create_app(TestConfig, SQLALCHEMY_DATABASE_URI=app.config["SQLALCHEMY_DATABASE_URI"]) is app
+
+
+def test_create_app_rejects_different_config(app):
+    with pytest.raises(RuntimeError, match="SQLALCHEMY_DATABASE_URI"):
+        create_app(TestConfig, SQLALCHEMY_DATABASE_URI="sqlite:///other.db")
+    with pytest.raises(RuntimeError, match="DEBUG"):
+        create_app(TestConfig, SQLALCHEMY_DATABASE_URI=app.config["SQLALCHEMY_DATABASE_URI"], DEBUG=True)
+
+
+
+def test_pooled_connections_are_not_shared_across_fork(tmp_path, monkeypatch):
+    engine = create_engine("sqlite:///" + str(tmp_path / "pool.db"), poolclass=QueuePool)
+    connection = engine.raw_connection()
+    inherited = connection.connection
+    connection.close()
+    connection = engine.raw_connection()
+    assert connection.connection is inherited
+    connection.close()
+    # as in a worker forked after the master used the pool
+    monkeypatch.setattr("os.getpid", lambda: -1)
+    connection = engine.raw_connection()
+    assert connection.connection is not inherited
+    connection.close()
+    engine.dispose()
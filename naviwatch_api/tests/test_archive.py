@@ -0,0 +1,72 @@
+from app import archive, cache, db, models, rollup
+import datetime
+
+
+def test_archived_xids_are_not_reused(app, client, pet):
+    created = [client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"}).get_json()["data"]["xid"]
+               for _ in range(3)]
+    with app.app_context():
+        moved = archive.archive_model(models.Food, datetime.datetime.utcnow() + datetime.timedelta(days=1))
+        assert moved == 2
+        assert [row.xid for row in db.session.query(models.Food)] == created[2:]
+
+    # with the newest row kept live, and AUTOINCREMENT, deleting it doesn't bring back archived xids either
+    client.delete("/food/{}".format(created[2]))
+    xid = client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"}).get_json()["data"]["xid"]
+    assert xid > created[2]
+
+    xids = [row["xid"] for row in client.get("/food/?include_archive=true").get_json()["data"]]
+    assert sorted(xids) == created[:2] + [xid]
+
+
+def test_cached_reads_depend_on_archive(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_ENABLED", True)
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    etags = {url: client.get(url).headers["ETag"]
+             for url in ("/food/?include_archive=true", "/pet/{}/summary?include_archive=true".format(pet))}
+    with app.app_context():
+        archived = archive.ARCHIVES[models.Food].__table__
+        db.session.execute(archived.insert().values(xid=0, pet_xid=pet, date_created=datetime.datetime(2020, 1, 1)))
+        cache.touch(db.session, archived.name)
+        db.session.commit()
+    for url, etag in etags.items():
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_flush_after_writes_from_another_process(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_ENABLED", True)
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "dry"})
+    etag = client.get("/food/").headers["ETag"]
+    with app.app_context():
+        # like "flask archive" in its own process: this process's table versions don't change
+        db.session.execute(models.Food.__table__.insert().values(pet_xid=pet, foodtype="wet"))
+        db.session.commit()
+    assert client.get("/food/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.delete("/_internal/cache").status_code == 200
+    response = client.get("/food/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [row["foodtype"] for row in response.get_json()["data"]] == ["dry", "wet"]
+
+
+def test_archive_command_keeps_daily_stats(app, client, pet):
+    def counts():
+        return [(row["day"], row["pees"], row["poos"])
+                for row in client.get("/pet/{}/daily?until=2019-06-01".format(pet)).get_json()["data"]]
+
+    client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True, "date_created": "2019-05-16T08:00:00"},
+                                       {"pet_xid": pet, "poo": True, "date_created": "2019-05-17T08:00:00"}])
+    client.post("/toilet/", json={"pet_xid": pet, "pee": True})
+    daily = counts()
+    assert daily == [("2019-05-16", 1, 0), ("2019-05-17", 0, 1)]
+
+    result = app.test_cli_runner().invoke(args=["archive", "--older-than", "30d", "--batch-size", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Archived 2 rows" in result.output
+    assert len(client.get("/toilet/").get_json()["data"]) == 1
+    assert len(client.get("/toilet/?include_archive=true").get_json()["data"]) == 3
+    assert counts() == daily
+    with app.app_context():
+        rollup.rebuild()
+    assert counts() == daily
+
+    assert app.test_cli_runner().invoke(args=["archive", "--older-than", "soon"]).exit_code == 2
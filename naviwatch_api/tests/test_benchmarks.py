@@ -0,0 +1,36 @@
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _routes():
+    spec = importlib.util.spec_from_file_location("routes", os.path.join(BASEDIR, "benchmarks", "routes.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compare_flags_p95_regressions():
+    baseline = {"results": {"GET /pet/": {"p95_ms": 10.0}, "GET /food/": {"p95_ms": 10.0}}}
+    report = {"results": {"GET /pet/": {"p95_ms": 12.0}, "GET /food/": {"p95_ms": 13.0}, "GET /new/": {"p95_ms": 99.0}}}
+    assert _routes().compare(report, baseline, 0.25) == ["GET /food/: p95 13.000 ms vs baseline 10.000 ms"]
+
+
+def test_every_route_runs(tmp_path):
+    # the benchmark loads config.py like the app does, see "Setup" in the readme
+    shutil.copy(os.path.join(BASEDIR, "config.template.py"), str(tmp_path / "config.py"))
+    report = tmp_path / "report.json"
+    command = [sys.executable, os.path.join(BASEDIR, "benchmarks", "routes.py"), "--pets", "2", "--people", "1",
+               "--things", "2", "--days", "1", "--per-day", "1", "--bulk-size", "2", "--upsert-keys", "2",
+               "--requests", "3", "--warmup", "0", "--output", str(report)]
+    result = subprocess.run(command, env=dict(os.environ, PYTHONPATH=str(tmp_path)), stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    assert result.returncode == 0, result.stderr
+    results = json.loads(report.read_text())["results"]
+    assert {"GET /pet/", "PUT /pet/by-name/<value>", "POST /toilet/_bulk"} <= set(results)
+    assert all(route["n"] == 3 for route in results.values())
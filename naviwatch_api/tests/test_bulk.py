@@ -0,0 +1,66 @@
+from app import db
+from sqlalchemy import event
+import sqlite3
+
+
+def test_bulk_insert(client, pet):
+    response = client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True}, {"pet_xid": pet, "poo": True}])
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"inserted": 2}
+    assert len(client.get("/toilet/").get_json()["data"]) == 2
+
+
+def test_bulk_rejects_missing_references(client, pet):
+    response = client.post("/food/_bulk", json=[{"pet_xid": pet, "foodtype": "dry"},
+                                                {"pet_xid": pet + 100, "foodtype": "wet"}])
+    assert response.status_code == 422
+    assert list(response.get_json()["error"]) == ["1"]
+    assert client.get("/food/").status_code == 404
+
+
+def test_bulk_reference_deleted_after_check(app, client, pet):
+    def delete_pet(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO "Food"'):
+            other = sqlite3.connect(db.engine.url.database)
+            other.execute('DELETE FROM "Pet" WHERE xid = ?', (pet,))
+            other.commit()
+            other.close()
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", delete_pet)
+    try:
+        response = client.post("/food/_bulk", json=[{"pet_xid": pet, "foodtype": "dry"}])
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", delete_pet)
+    assert response.status_code == 422
+
+
+def test_bulk_rejects_bad_bodies(app, client, pet, monkeypatch):
+    assert client.post("/toilet/_bulk", json={"pet_xid": pet}).status_code == 422
+    assert client.post("/toilet/_bulk", json=[]).status_code == 422
+    response = client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True}, {"pet_xid": pet, "pee": "often"}])
+    assert response.status_code == 422
+    assert list(response.get_json()["error"]) == ["1"]
+    monkeypatch.setitem(app.config, "BULK_MAX_ROWS", 2)
+    assert client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True}] * 3).status_code == 422
+    assert client.get("/toilet/").status_code == 404
+
+
+def test_bulk_inserts_in_chunks(app, client, pet, monkeypatch):
+    statements = list()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO "Toilet"'):
+            statements.append(statement)
+
+    monkeypatch.setitem(app.config, "BULK_INSERT_CHUNK_SIZE", 20)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        assert client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True}] * 50).status_code == 200
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert len(statements) == 3
+    assert len(client.get("/toilet/").get_json()["data"]) == 50
@@ -0,0 +1,40 @@
+from app import db
+from sqlalchemy import event
+import pytest
+
+
+@pytest.fixture
+def statements(app):
+    """ SQL statements run while the test uses it """
+    executed = list()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    yield executed
+    with app.app_context():
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_conditional_get_without_queries(app, client, pet, monkeypatch, statements):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_ENABLED", True)
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    first = client.get("/food/")
+    etag = first.headers["ETag"]
+    del statements[:]
+    assert client.get("/food/", headers={"If-None-Match": etag}).status_code == 304
+    repeated = client.get("/food/")
+    assert repeated.headers["ETag"] == etag and repeated.get_data() == first.get_data()
+    assert statements == []
+
+
+def test_writes_invalidate_dependent_responses(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_ENABLED", True)
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    food, pets, people = (client.get(url).headers["ETag"] for url in ("/food/", "/pet/?expand=food", "/person/"))
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "meat"})
+    assert client.get("/food/", headers={"If-None-Match": food}).status_code == 200
+    assert client.get("/pet/?expand=food", headers={"If-None-Match": pets}).status_code == 200
+    assert client.get("/person/", headers={"If-None-Match": people}).status_code == 304
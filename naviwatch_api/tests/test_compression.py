@@ -0,0 +1,42 @@
+import gzip
+import json
+
+
+def _foods(client, pet, count):
+    client.post("/food/_bulk", json=[{"pet_xid": pet, "foodtype": "kibble"}] * count)
+
+
+def test_gzip_above_threshold(app, client, pet):
+    _foods(client, pet, 50)
+    plain = client.get("/food/")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    compressed = client.get("/food/", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert len(compressed.get_data()) < len(plain.get_data())
+
+
+def test_small_bodies_are_not_compressed(client, pet):
+    response = client.get("/pet/", headers={"Accept-Encoding": "gzip"})
+    assert len(response.get_data()) < 1024
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streams_are_compressed_as_they_are_written(client, pet):
+    _foods(client, pet, 3)
+    response = client.get("/food/", headers={"Accept-Encoding": "gzip", "Accept": "application/x-ndjson"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(response.get_data()).decode().splitlines()
+    assert [json.loads(line)["foodtype"] for line in lines] == ["kibble"] * 3
+
+
+def test_compressed_responses_keep_conditional_gets(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_ENABLED", True)
+    _foods(client, pet, 50)
+    response = client.get("/food/", headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+    assert client.get("/food/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+    assert client.get("/food/", headers={"Accept-Encoding": "gzip"}).get_data() == response.get_data()
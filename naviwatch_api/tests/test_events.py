@@ -0,0 +1,66 @@
+from app import events
+
+
+def _start(last_event_id):
+    """ the messages a stream sends before it waits for new events """
+    messages = list()
+    for message in events.stream(last_event_id):
+        messages.append(message)
+        if message.startswith("retry:"):
+            return messages
+
+
+def test_resume_from_buffered_id(client, pet):
+    last_id = events.format_id(events.hub.last_id)
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    stream = events.stream(last_id)
+    assert next(stream).startswith("retry:")
+    assert next(stream).startswith("id: {}\nevent: created\n".format(events.format_id(events.hub.last_id)))
+
+
+def test_reset_for_ids_from_another_process(client):
+    for last_event_id in ("500", "someotherepoch-500", events.format_id(events.hub.last_id + 500)):
+        assert _start(last_event_id)[0].startswith("event: reset\n")
+
+
+def test_no_reset_when_up_to_date(client):
+    assert len(_start(events.format_id(events.hub.last_id))) == 1
+    assert len(_start(None)) == 1
+
+
+def test_reset_for_ids_from_a_sibling_worker(client, monkeypatch):
+    # workers forked from a preloading master start with the master's module state, but not its epoch
+    issued = events.format_id(events.hub.last_id)
+    monkeypatch.setattr("os.getpid", lambda: -1)
+    assert events.format_id(events.hub.last_id) != issued
+    assert _start(issued)[0].startswith("event: reset\n")
+
+
+def test_replay_honours_filters(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "EVENT_HEARTBEAT_SECONDS", 0.1)
+    last_id = events.format_id(events.hub.last_id)
+    other = client.post("/pet/", json={"name": "Fido", "animal": "dog"}).get_json()["data"]["xid"]
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    client.post("/food/", json={"pet_xid": other, "foodtype": "kibble"})
+    client.post("/toilet/", json={"pet_xid": pet, "pee": True})
+    stream = events.stream(last_id, pet_xid=pet, table="Food")
+    assert next(stream).startswith("retry:")
+    message = next(stream)
+    assert '"table": "Food"' in message and '"pet_xid": {}'.format(pet) in message
+    assert next(stream).startswith(":")
+
+
+def test_only_committed_writes_are_published(client, pet):
+    last_id = events.hub.last_id
+    assert client.post("/thing/", json={"name": "ball"}).status_code == 200
+    assert events.hub.last_id == last_id + 1
+    assert client.post("/thing/", json={"name": "ball"}).status_code == 422
+    assert events.hub.last_id == last_id + 1
+
+
+def test_stream_endpoint(client):
+    response = client.get("/events/stream", headers={"Accept": "text/event-stream"})
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert next(iter(response.response)).startswith(b"retry:")
+    response.close()
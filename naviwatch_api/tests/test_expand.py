@@ -0,0 +1,27 @@
+import re
+
+
+def _queries(response):
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+
+def test_collections_only_when_expanded(client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    client.post("/toilet/", json={"pet_xid": pet, "pee": True})
+    assert "food" not in client.get("/pet/").get_json()["data"][0]
+    row = client.get("/pet/?expand=food").get_json()["data"][0]
+    assert [food["foodtype"] for food in row["food"]] == ["kibble"]
+    assert "toilet" not in row
+    assert {"food", "toilet"} <= set(client.get("/pet/?expand=all").get_json()["data"][0])
+    assert client.get("/pet/?expand=walks").status_code == 400
+
+
+def test_expand_query_count_does_not_grow_with_rows(client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    one = _queries(client.get("/pet/?expand=food,toilet"))
+    for name in ("Fido", "Bella", "Max"):
+        xid = client.post("/pet/", json={"name": name, "animal": "dog"}).get_json()["data"]["xid"]
+        client.post("/food/", json={"pet_xid": xid, "foodtype": "kibble"})
+    response = client.get("/pet/?expand=food,toilet")
+    assert len(response.get_json()["data"]) == 4
+    assert _queries(response) == one
@@ -0,0 +1,62 @@
+from app import archive, models
+import csv
+import datetime
+import io
+import pytest
+
+
+def test_csv_export(client, pet):
+    for _ in range(3):
+        client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    response = client.get("/export/food.csv?pet_xid={}".format(pet))
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["foodtype"] for row in rows] == ["kibble"] * 3
+    assert all(datetime.datetime.fromisoformat(row["date_created"]).utcoffset() == datetime.timedelta(0)
+               for row in rows)
+
+
+def test_arrow_export(client, pet):
+    pyarrow = pytest.importorskip("pyarrow")
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    response = client.get("/export/food.arrow")
+    assert response.status_code == 200
+    table = pyarrow.ipc.open_stream(response.get_data()).read_all()
+    assert table.column("foodtype").to_pylist() == ["kibble"]
+    assert table.schema.field("date_created").type == pyarrow.timestamp("us", tz="UTC")
+
+
+def test_unknown_export(client):
+    assert client.get("/export/pet.csv").status_code == 404
+    assert client.get("/export/food.xlsx").status_code == 404
+
+
+def test_export_filters_and_archive_in_batches(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "EXPORT_BATCH_SIZE", 1)
+    client.post("/food/_bulk", json=[{"pet_xid": pet, "foodtype": foodtype, "date_created": created}
+                                     for foodtype, created in (("old", "2019-01-01T08:00:00"),
+                                                               ("older", "2018-01-01T08:00:00"),
+                                                               ("new", "2026-01-01T08:00:00"))])
+    with app.app_context():
+        archive.archive_model(models.Food, datetime.datetime(2020, 1, 1))
+
+    def foodtypes(query):
+        response = client.get("/export/food.csv?" + query)
+        assert response.is_streamed
+        return [row["foodtype"] for row in csv.DictReader(io.StringIO(response.get_data(as_text=True)))]
+
+    assert foodtypes("") == ["new"]
+    assert foodtypes("include_archive=true") == ["old", "older", "new"]
+    assert foodtypes("include_archive=true&since=2018-06-01") == ["old", "new"]
+    assert foodtypes("pet_xid={}&include_archive=true".format(pet + 100)) == []
+
+
+def test_parquet_export(client, pet):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    client.post("/toilet/", json={"pet_xid": pet, "pee": True})
+    response = client.get("/export/toilet.parquet")
+    assert response.mimetype == "application/vnd.apache.parquet"
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.get_data()))
+    assert table.column("pee").to_pylist() == [True]
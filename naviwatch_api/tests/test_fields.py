@@ -0,0 +1,29 @@
+from app import db
+from sqlalchemy import event
+
+
+def test_fields_limit_output_and_selected_columns(app, client, pet):
+    client.post("/activities/", json={"pet_xid": pet, "act_type": "walk", "comment": "park"})
+    statements = list()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        data = client.get("/activities/?pet_xid={}&fields=xid,act_type".format(pet)).get_json()["data"]
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert [set(row) for row in data] == [{"xid", "act_type"}]
+    select = next(statement for statement in statements if 'FROM "Activities"' in statement)
+    assert "act_type" in select and "comment" not in select
+
+
+def test_nested_fields(client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    row = client.get("/pet/?fields=name,food.foodtype").get_json()["data"][0]
+    assert row == {"name": "Rex", "food": [{"foodtype": "kibble"}]}
+    assert client.get("/pet/?fields=name,shoe_size").status_code == 400
+    assert client.get("/pet/?fields=food.flavour").status_code == 400
@@ -0,0 +1,31 @@
+from app import fulltext, models
+
+
+def _comments(client, query):
+    response = client.get("/activities/?" + query)
+    return [row["comment"] for row in response.get_json()["data"]] if response.status_code == 200 else []
+
+
+def test_search_ranks_matches(app, client, pet):
+    with app.app_context():
+        assert fulltext._has_fts_table(models.Activities)
+    client.post("/activities/_bulk", json=[{"pet_xid": pet, "act_type": "walk", "comment": comment} for comment in (
+        "short walk", "walk in the park, long walk by the park pond", "vet visit")])
+    assert _comments(client, "q=park%20walk")[0] == "walk in the park, long walk by the park pond"
+    assert set(_comments(client, "q=walk")) == {"short walk", "walk in the park, long walk by the park pond"}
+    assert _comments(client, "q=park%20walk&limit=1") == ["walk in the park, long walk by the park pond"]
+    assert _comments(client, "q=grooming") == []
+
+    # edits and deletes reach the index through the triggers
+    xid = next(row["xid"] for row in client.get("/activities/?comment=vet*").get_json()["data"])
+    client.put("/activities/{}".format(xid), json={"comment": "vet visit after the park"})
+    assert "vet visit after the park" in _comments(client, "q=park")
+    client.delete("/activities/{}".format(xid))
+    assert "vet visit after the park" not in _comments(client, "q=park")
+
+
+def test_search_input_is_not_a_query_language(client, pet):
+    client.post("/activities/", json={"pet_xid": pet, "act_type": "walk", "comment": "NEAR the river"})
+    assert _comments(client, 'q=" NEAR(river* OR -') == ["NEAR the river"]
+    assert client.get("/activities/?q=!!!").status_code == 400
+    assert client.get("/toilet/?q=walk").status_code == 400
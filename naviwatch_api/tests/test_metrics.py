@@ -0,0 +1,27 @@
+from app import metrics
+import re
+
+
+def _in_flight(endpoint):
+    match = re.search(r'naviwatch_http_requests_in_flight\{{endpoint="{}",method="GET"\}} (-?\d+)'.format(
+        re.escape(endpoint)), metrics.render())
+    return int(match.group(1)) if match else 0
+
+
+def test_metrics_endpoint(client, pet):
+    client.get("/pet/")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE naviwatch_http_request_duration_seconds histogram" in body
+    assert re.search(r'naviwatch_http_requests_total\{endpoint="[^"]+",method="POST",status="200"\} \d+', body)
+
+
+def test_streamed_response_in_flight_until_closed(app, client, pet):
+    endpoint = next(rule.endpoint for rule in app.url_map.iter_rules() if rule.rule == "/pet/"
+                    and "GET" in rule.methods)
+    before = _in_flight(endpoint)
+    response = client.get("/pet/?stream=true")
+    assert response.is_streamed
+    assert _in_flight(endpoint) == before + 1
+    response.get_data()
+    response.close()
+    assert _in_flight(endpoint) == before
@@ -0,0 +1,42 @@
+from app import db, models
+
+
+def test_date_created_cursor_with_null_dates(app, client, pet):
+    created = [client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"}).get_json()["data"]["xid"]
+               for _ in range(4)]
+    with app.app_context():
+        db.session.query(models.Food).filter(models.Food.xid.in_(created[1:3])).update({"date_created": None},
+                                                                                 synchronize_session=False)
+        db.session.commit()
+
+    xids = list()
+    url = "/food/?order_by=date_created&limit=1"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        body = response.get_json()
+        xids.extend(row["xid"] for row in body["data"])
+        url = body["next"] and "/food/?order_by=date_created&limit=1&cursor=" + body["next"]
+    assert xids == [created[1], created[2], created[0], created[3]]
+
+
+def test_xid_cursor_pages_through_collection(client, pet):
+    created = [client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"}).get_json()["data"]["xid"]
+               for _ in range(5)]
+    first = client.get("/food/?limit=2").get_json()
+    assert [row["xid"] for row in first["data"]] == created[:2]
+    second = client.get("/food/?limit=2&cursor=" + first["next"]).get_json()
+    assert [row["xid"] for row in second["data"]] == created[2:4]
+    last = client.get("/food/?limit=2&cursor=" + second["next"]).get_json()
+    assert [row["xid"] for row in last["data"]] == created[4:]
+    assert last["next"] is None
+
+
+def test_bad_pagination_arguments(client, pet):
+    for _ in range(2):
+        client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    cursor = client.get("/food/?limit=1&order_by=date_created").get_json()["next"]
+    assert client.get("/food/?limit=1&cursor=" + cursor).status_code == 400
+    assert client.get("/food/?limit=1&cursor=garbage").status_code == 400
+    assert client.get("/food/?limit=ten").status_code == 400
+    assert client.get("/food/?limit=1&order_by=foodtype").status_code == 400
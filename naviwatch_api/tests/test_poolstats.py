@@ -0,0 +1,30 @@
+from app import poolstats
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+def test_pool_endpoint_counts_checkouts(client):
+    before = client.get("/_internal/pool").get_json()["data"]
+    client.get("/person/")
+    after = client.get("/_internal/pool").get_json()["data"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["acquires"] > before["acquires"]
+
+
+def test_checkout_timeouts_and_waits(tmp_path):
+    engine = poolstats.instrument(create_engine("sqlite:///" + str(tmp_path / "pool.db"), poolclass=QueuePool,
+                                                pool_size=1, max_overflow=0, pool_timeout=0.05))
+    assert poolstats.instrument(engine) is engine
+    before = poolstats.stats(engine)
+    held = engine.connect()
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    stats = poolstats.stats(engine)
+    assert (stats["size"], stats["checkedout"], stats["overflow"]) == (1, 1, 0)
+    assert stats["timeouts"] == before["timeouts"] + 1
+    assert stats["acquires"] == before["acquires"] + 2
+    assert stats["wait_ms_max"] >= 50
+    held.close()
+    engine.dispose()
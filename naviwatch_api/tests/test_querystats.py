@@ -0,0 +1,26 @@
+def test_server_timing_counts_queries(client, pet):
+    response = client.get("/pet/")
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert not response.headers["Server-Timing"].endswith('"0 queries"')
+
+
+def test_no_server_timing_on_streamed_responses(client, pet):
+    response = client.get("/pet/?stream=true")
+    assert response.is_streamed
+    assert "Server-Timing" not in response.headers
+    response.get_data()
+
+
+def test_slow_and_repeated_statements_are_logged(app, client, pet, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "SQL_SLOW_QUERY_MS", 0)
+    monkeypatch.setitem(app.config, "SQL_REPEATED_STATEMENT_THRESHOLD", 0)
+    client.get("/pet/")
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("Slow query") and "in pet_get_all" in message for message in messages)
+    assert any(message.startswith("Possible N+1 query: statement ran 1 times in GET pet_get_all")
+               for message in messages)
+
+
+def test_timing_can_be_disabled(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "SQL_TIMING_ENABLED", False)
+    assert "Server-Timing" not in client.get("/pet/").headers
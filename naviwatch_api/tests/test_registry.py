@@ -0,0 +1,32 @@
+from app import controllers
+
+
+def test_every_resource_has_crud_routes(app):
+    endpoints = {rule.endpoint: rule.methods for rule in app.url_map.iter_rules()}
+    for name, resource in controllers.resources.items():
+        assert "GET" in endpoints["{}_get_all".format(name)]
+        for endpoint, method in (("{}_get_xid", "GET"), ("route_{}_post", "POST"), ("route_{}_put", "PUT"),
+                                 ("route_{}_delete", "DELETE")):
+            assert method in endpoints[endpoint.format(name)]
+        assert ("route_{}_bulk_post".format(name) in endpoints) == resource.bulk
+
+
+def test_crud_round_trip(client):
+    xid = client.post("/thing/", json={"name": "ball", "description": "red"}).get_json()["data"]["xid"]
+    assert client.get("/thing/{}".format(xid)).get_json()["data"]["description"] == "red"
+    assert client.put("/thing/{}".format(xid), json={"description": "blue"}).status_code == 200
+    assert client.get("/thing/{}".format(xid)).get_json()["data"]["description"] == "blue"
+    assert client.delete("/thing/{}".format(xid)).status_code == 200
+    assert client.get("/thing/{}".format(xid)).status_code == 404
+
+
+def test_filter_plan_operators(client, pet):
+    client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True}, {"pet_xid": pet, "poo": True}])
+    client.post("/activities/_bulk", json=[{"pet_xid": pet, "act_type": "walk", "comment": "garden"},
+                                           {"pet_xid": pet, "act_type": "walk", "comment": "kitchen floor"}])
+    assert len(client.get("/toilet/?pee=true").get_json()["data"]) == 1
+    assert [row["comment"] for row in client.get("/activities/?comment=kit*").get_json()["data"]] == ["kitchen floor"]
+    assert len(client.get("/toilet/?pet_xid={}".format(pet)).get_json()["data"]) == 2
+    assert client.get("/toilet/?pet_xid={}".format(pet + 100)).status_code == 404
+    # unparseable values are ignored rather than failing the request
+    assert len(client.get("/toilet/?pee=maybe").get_json()["data"]) == 2
@@ -0,0 +1,56 @@
+from app import db, models, rollup
+from collections import Counter
+import datetime
+
+
+def _stats(app):
+    with app.app_context():
+        return [(row.pet_xid, row.day, row.feeds, row.waterchecks)
+                for row in db.session.query(models.DailyPetStats).order_by(models.DailyPetStats.day)]
+
+
+def test_events_update_rollup(app, client, pet):
+    for _ in range(3):
+        assert client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"}).status_code == 200
+    assert client.post("/water/", json={"pet_xid": pet, "act_type": "refill"}).status_code == 200
+    assert _stats(app) == [(pet, datetime.datetime.utcnow().date(), 3, 1)]
+
+
+def test_delete_pet_with_events(app, client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    response = client.delete("/pet/{}".format(pet))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert _stats(app) == []
+
+
+def test_apply_upserts_existing_row(app, client, pet):
+    day = datetime.date(2026, 1, 1)
+    with app.app_context():
+        connection = db.session.connection()
+        rollup.apply(connection, {(pet, day): Counter(feeds=1)})
+        # a second first-event for the same key (e.g. from a concurrent request) adds to the row instead of failing
+        rollup.apply(connection, {(pet, day): Counter(feeds=2, waterchecks=1)})
+        rollup.apply(connection, {(pet, day): Counter(feeds=-1)})
+        rollup.apply(connection, {(pet, datetime.date(2026, 1, 2)): Counter(feeds=-1)})
+        db.session.commit()
+    assert _stats(app) == [(pet, day, 2, 1)]
+
+
+def test_daily_stats_follow_updates_and_deletes(app, client, pet):
+    client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True, "date_created": "2019-05-16T08:00:00"},
+                                       {"pet_xid": pet, "poo": True, "date_created": "2019-05-16T09:00:00"},
+                                       {"pet_xid": pet, "pee": True, "accidnet": True,
+                                        "date_created": "2019-05-17T08:00:00"}])
+    xids = [row["xid"] for row in client.get("/toilet/").get_json()["data"]]
+    assert client.put("/toilet/{}".format(xids[1]), json={"date_created": "2019-05-17T09:00:00"}).status_code == 200
+    assert client.delete("/toilet/{}".format(xids[0])).status_code == 200
+
+    def daily():
+        return [(row["day"], row["pees"], row["poos"], row["accidents"])
+                for row in client.get("/pet/{}/daily?since=2019-05-01".format(pet)).get_json()["data"]]
+
+    incremental = daily()
+    assert incremental == [("2019-05-16", 0, 0, 0), ("2019-05-17", 1, 1, 1)]
+    with app.app_context():
+        rollup.rebuild()
+    assert [row for row in daily() if any(row[1:])] == [row for row in incremental if any(row[1:])]
@@ -0,0 +1,27 @@
+from app import db, models, seed
+import datetime
+import pytest
+import random
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_timestamps_follow_schedule(monkeypatch, vectorized):
+    if not vectorized:
+        monkeypatch.setattr(seed, "numpy", None)
+    elif seed.numpy is None:
+        pytest.skip("numpy is not installed")
+    start = datetime.datetime(2026, 1, 1)
+    times = seed.timestamps(random.Random(1), start, 30, 4, seed.SCHEDULES[models.Food])
+    assert times == seed.timestamps(random.Random(1), start, 30, 4, seed.SCHEDULES[models.Food])
+    assert len(times) == 120 and times == sorted(times)
+    for day in range(30):
+        assert {time.date() for time in times[day * 4:(day + 1) * 4]} == {(start + datetime.timedelta(days=day)).date()}
+
+
+def test_seed_inserts_and_rolls_up(app, client):
+    with app.app_context():
+        counts = seed.seed(3, pets=2, people=1, per_day_overrides={models.Activities: 0}, random_seed=1)
+        assert counts[models.Food.__tablename__] == 2 * 3 * seed.PER_DAY[models.Food]
+        assert counts[models.Activities.__tablename__] == 0
+        assert db.session.query(models.Food).count() == counts[models.Food.__tablename__]
+        assert sum(row.feeds for row in db.session.query(models.DailyPetStats)) == counts[models.Food.__tablename__]
@@ -0,0 +1,25 @@
+from app import controllers, schema, serializer
+from flask import json
+
+
+def test_compiled_dumps_match_marshmallow(app, client, pet, monkeypatch):
+    with app.app_context():
+        assert serializer.compile_schema(schema.ToiletSchema()) is not None
+        assert serializer.compile_schema(schema.PetSchema(exclude=("food", "watercheck", "activities", "toilet")))
+    client.post("/toilet/", json={"pet_xid": pet, "pee": True, "accidnet": False})
+    client.post("/activities/", json={"pet_xid": pet, "act_type": "walk", "comment": "café </script>  "})
+    client.post("/thing/", json={"name": "ball"})
+    urls = ["/{}/".format(name) for name in controllers.resources] + \
+        ["/activities/?fields=comment,pet", "/pet/?expand=toilet", "/toilet/?limit=1"]
+    for url in urls:
+        monkeypatch.setitem(app.config, "FAST_SERIALIZER_ENABLED", True)
+        fast = client.get(url)
+        monkeypatch.setitem(app.config, "FAST_SERIALIZER_ENABLED", False)
+        slow = client.get(url)
+        assert (fast.status_code, fast.get_data()) == (slow.status_code, slow.get_data()), url
+
+
+def test_encode_matches_flask_json(app):
+    value = {"b": [1, True, None, "café"], "a": "</script>   & <"}
+    with app.app_context():
+        assert serializer.encode(value, plain=True) == json.dumps(value, separators=(",", ":")) + "\n"
@@ -0,0 +1,28 @@
+import json
+
+
+def test_ndjson_stream_matches_collection(client, pet):
+    for foodtype in ("kibble", "meat", "fish"):
+        client.post("/food/", json={"pet_xid": pet, "foodtype": foodtype})
+    expected = client.get("/food/").get_json()["data"]
+    response = client.get("/food/?limit=1", headers={"Accept": "application/x-ndjson"})
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == expected
+
+
+def test_streamed_json_envelope(client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    response = client.get("/food/?stream=true&pet_xid={}".format(pet))
+    assert response.is_streamed
+    assert response.get_json() == {"__args": {"stream": "true", "pet_xid": str(pet)},
+                                   "data": client.get("/food/").get_json()["data"]}
+
+
+def test_stream_rejects_expanded_collections(client, pet):
+    client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    assert client.get("/pet/?stream=true&expand=food").status_code == 400
+    assert client.get("/pet/?stream=true&fields=name,food.foodtype").status_code == 400
+    response = client.get("/pet/?stream=true")
+    assert response.status_code == 200
+    assert "food" not in response.get_json()["data"][0]
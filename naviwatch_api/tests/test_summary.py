@@ -0,0 +1,16 @@
+def test_summary(client, pet):
+    client.post("/food/_bulk", json=[{"pet_xid": pet, "foodtype": "kibble", "date_created": "2019-05-16T08:00:00"},
+                                     {"pet_xid": pet, "foodtype": "kibble", "date_created": "2019-05-16T12:00:00"},
+                                     {"pet_xid": pet, "foodtype": "kibble", "date_created": "2019-05-16T20:00:00"}])
+    client.post("/toilet/_bulk", json=[{"pet_xid": pet, "pee": True, "date_created": "2019-05-16T08:30:00"},
+                                       {"pet_xid": pet, "poo": True, "accidnet": True,
+                                        "date_created": "2019-05-17T09:00:00"}])
+    summary = client.get("/pet/{}/summary".format(pet)).get_json()["data"]
+    assert summary["food"] == {"count": 3, "first": "2019-05-16T08:00:00+00:00", "last": "2019-05-16T20:00:00+00:00",
+                               "mean_interval_seconds": 6 * 3600}
+    assert summary["toilet"]["pees"] == 1 and summary["toilet"]["accident_ratio"] == 0.5
+    assert summary["watercheck"] == {"count": 0, "first": None, "last": None}
+
+    summary = client.get("/pet/{}/summary?until=2019-05-17".format(pet)).get_json()["data"]
+    assert (summary["food"]["count"], summary["toilet"]["count"], summary["toilet"]["accidents"]) == (3, 1, 0)
+    assert client.get("/pet/{}/summary".format(pet + 100)).status_code == 404
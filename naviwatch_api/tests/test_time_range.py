@@ -0,0 +1,27 @@
+from app import db
+from sqlalchemy import text
+
+
+def _toilet(client, pet, *times):
+    response = client.post("/toilet/_bulk",
+                           json=[{"pet_xid": pet, "pee": True, "date_created": time} for time in times])
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def _days(client, query):
+    return [row["date_created"][:10] for row in client.get("/toilet/?" + query).get_json()["data"]]
+
+
+def test_since_until_is_half_open(client, pet):
+    _toilet(client, pet, "2019-05-15T23:00:00", "2019-05-16T00:00:00", "2019-05-16T13:40:23", "2019-05-17T00:00:00")
+    assert _days(client, "since=2019-05-16&until=2019-05-17") == ["2019-05-16", "2019-05-16"]
+    assert _days(client, "pet_xid={}&since=2019-05-17".format(pet)) == ["2019-05-17"]
+    assert _days(client, "until=2019-05-16T01:30:00%2B02:00") == ["2019-05-15"]
+    assert client.get("/toilet/?since=yesterday").status_code == 400
+
+
+def test_range_uses_pet_date_index(app, client):
+    with app.app_context():
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN SELECT * FROM "Toilet" WHERE pet_xid = 1 AND '
+                                       "date_created >= '2019-05-16' AND date_created < '2019-05-17'")).fetchall()
+    assert "ix_Toilet_pet_xid_date_created" in " ".join(str(row[-1]) for row in plan)
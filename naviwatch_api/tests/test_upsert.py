@@ -0,0 +1,16 @@
+def test_upsert_creates_then_updates_posted_fields(client):
+    created = client.put("/pet/by-name/Navi", json={"animal": "dog", "birthday": "2018-03-01"})
+    assert created.status_code == 200
+    xid = created.get_json()["data"]["xid"]
+    updated = client.put("/pet/by-name/Navi", json={"animal": "cat"}).get_json()["data"]
+    assert (updated["xid"], updated["animal"], updated["birthday"]) == (xid, "cat", "2018-03-01")
+    assert [row["name"] for row in client.get("/pet/").get_json()["data"]] == ["Navi"]
+
+
+def test_duplicate_names_are_rejected_by_the_database(client):
+    assert client.post("/thing/", json={"name": "ball"}).status_code == 200
+    response = client.post("/thing/", json={"name": "ball"})
+    assert response.status_code == 422
+    assert "already exists" in response.get_json()["error"]["name"][0]
+    xid = client.post("/thing/", json={"name": "rope"}).get_json()["data"]["xid"]
+    assert client.put("/thing/{}".format(xid), json={"name": "ball"}).status_code == 409
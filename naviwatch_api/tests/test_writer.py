@@ -0,0 +1,44 @@
+from app import db, models, writer
+import time
+
+
+def _wait(client, tracking_id):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        status = client.get("/writes/{}".format(tracking_id)).get_json()["data"]
+        if status["status"] != "queued":
+            return status
+        time.sleep(0.01)
+    raise AssertionError("write {} still queued".format(tracking_id))
+
+
+def test_queued_posts(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "WRITE_QUEUE_ENABLED", True)
+    accepted = client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    assert accepted.status_code == 202
+    missing = client.post("/food/", json={"pet_xid": pet + 100, "foodtype": "kibble"})
+    committed = _wait(client, accepted.get_json()["data"]["tracking_id"])
+    assert committed["status"] == "committed"
+    assert client.get("/food/{}".format(committed["xid"])).get_json()["data"]["foodtype"] == "kibble"
+    failed = _wait(client, missing.get_json()["data"]["tracking_id"])
+    assert failed["status"] == "failed" and "pet_xid" in failed["error"]
+    assert client.post("/food/", json={"pet_xid": pet, "foodtype": 5}).status_code == 422
+    assert client.get("/writes/unknown").status_code == 404
+
+
+def test_full_queue_answers_503(app, client, pet, monkeypatch):
+    monkeypatch.setitem(app.config, "WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(writer.writer, "max_depth", 0)
+    response = client.post("/food/", json={"pet_xid": pet, "foodtype": "kibble"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_rows_arriving_together_share_a_commit(app, client, pet):
+    group = writer.Writer(max_batch=50, max_delay=0.5, max_depth=100, status_size=100)
+    ids = [group.submit(models.Food, {"pet_xid": pet, "foodtype": "kibble"}) for _ in range(10)]
+    group.stop()
+    assert group.counters["committed"] == 10 and group.counters["batches"] == 1
+    assert all(group.status(tracking_id)["status"] == "committed" for tracking_id in ids)
+    with app.app_context():
+        assert db.session.query(models.Food).count() == 10
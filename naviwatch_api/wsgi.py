@@ -0,0 +1,14 @@
+from app import create_app
+
+
+""" production entry point: the debug toolbar and debugger are never enabled here, whatever FLASK_DEBUG says """
+app = create_app(DEBUG=False)
+
+
+if __name__ == "__main__":
+    # single process, multi threaded alternative to gunicorn (e.g. on Windows): pip install waitress
+    from waitress import serve
+    serve(app,
+          host=app.config.get('FLASK_HOST'),
+          port=app.config.get('FLASK_PORT'),
+          threads=app.config.get('WAITRESS_THREADS', 8))